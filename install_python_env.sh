@@ -12,6 +12,7 @@ PYTHON_PACKAGES=(
     lxml
     marker-pdf
     pygame-ce
+    pypdf
     pytesseract
     requests
     selenium
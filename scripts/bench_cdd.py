@@ -0,0 +1,98 @@
+"""
+Benchmark cdd's directory walk on a synthetic tree.
+
+Builds a tree of --entries files and directories in a scratch directory
+(kept between runs with --tree), then times the old listdir walk, which
+stats every entry to tell directories from files, against the scandir
+walk that reads entry types from the listing, single-threaded and with
+--jobs listing threads.
+
+    python bench_cdd.py
+    python bench_cdd.py --entries 100000 --tree /tmp/cdd-tree --jobs 16
+"""
+
+import argparse
+import collections
+import importlib.machinery
+import importlib.util
+import os
+import pathlib
+import tempfile
+import time
+
+SCRIPT_PATH = pathlib.Path(__file__).with_name("cdd")
+LOADER = importlib.machinery.SourceFileLoader("cdd", str(SCRIPT_PATH))
+cdd = importlib.util.module_from_spec(importlib.util.spec_from_loader("cdd", LOADER))
+LOADER.exec_module(cdd)
+
+FILES_PER_DIR = 20
+DIRS_PER_DIR = 4
+
+
+def make_tree(root: str, entries: int) -> None:
+    """Fill ``root`` breadth first with directories of files and subdirs."""
+    made = 0
+    queue = collections.deque([root])
+    while made < entries:
+        current = queue.popleft()
+        for i in range(DIRS_PER_DIR):
+            path = os.path.join(current, f"dir{i}")
+            os.mkdir(path)
+            queue.append(path)
+        for i in range(FILES_PER_DIR):
+            open(os.path.join(current, f"file{i}.txt"), "w").close()
+        made += DIRS_PER_DIR + FILES_PER_DIR
+
+
+def walk_listdir(begin: str):
+    """The pre-scandir walk: listdir, then an isdir stat per entry."""
+    queue = collections.deque([begin])
+    while queue:
+        current = queue.popleft()
+        if os.path.isdir(current):
+            try:
+                queue.extend(
+                    os.path.join(current, filename) for filename in os.listdir(current)
+                )
+            except PermissionError:
+                pass
+            yield current
+
+
+def walk_scandir(begin: str, jobs: int = 1):
+    for path, _ in cdd.walk_dirs_bfs(begin, prune=(), jobs=jobs):
+        yield path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--tree", help="Directory to build the tree in (reused).")
+    parser.add_argument("--jobs", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        root = args.tree or os.path.join(scratch, "tree")
+        if not os.path.isdir(root):
+            os.makedirs(root)
+            start = time.perf_counter()
+            make_tree(root, args.entries)
+            print(f"built {args.entries} entries in {time.perf_counter() - start:.1f}s")
+
+        walks = [
+            ("listdir", walk_listdir),
+            ("scandir", walk_scandir),
+            (f"scandir -j{args.jobs}", lambda root: walk_scandir(root, args.jobs)),
+        ]
+        results = {}
+        for name, walk in walks:
+            start = time.perf_counter()
+            results[name] = list(walk(root))
+            elapsed = time.perf_counter() - start
+            print(f"{name:>12}: {elapsed:8.3f}s ({len(results[name])} directories)")
+        if any(result != results["listdir"] for result in results.values()):
+            raise SystemExit("Walks disagree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark the count_words backends on synthetic prose.
+
+The input is never held in memory as a whole: one chunk of synthetic
+text is fed repeatedly through the streaming counter, so the 1 GB run
+needs no more memory than the 1 MB one.
+
+    python bench_count_words.py
+    python bench_count_words.py --sizes 1M,10M --backends bytes
+"""
+
+import argparse
+import random
+import time
+
+from count_words import BACKENDS, CHUNK_SIZE, count_separators_stream
+
+WORDS = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "déjà"]
+SEPARATORS = [" ", " ", " ", " ", "\n", "  ", "—", " – "]
+
+UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+class RepeatingStream:
+    """A text stream yielding ``chunk`` until ``size`` characters are read."""
+
+    def __init__(self, chunk: str, size: int):
+        self.chunk = chunk
+        self.remaining = size
+
+    def read(self, n: int) -> str:
+        if self.remaining <= 0:
+            return ""
+        text = self.chunk[: min(n, self.remaining)]
+        self.remaining -= len(text)
+        return text
+
+
+def make_chunk(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        part = rng.choice(WORDS) + rng.choice(SEPARATORS)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size]
+
+
+def parse_size(text: str) -> int:
+    unit = UNITS.get(text[-1].upper())
+    if unit is None:
+        return int(text)
+    return int(text[:-1]) * unit
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1M,100M,1G",
+        help="Comma-separated input sizes in characters (default: 1M,100M,1G).",
+    )
+    parser.add_argument(
+        "--backends",
+        default=",".join(BACKENDS),
+        help="Comma-separated backends to compare (default: all).",
+    )
+    args = parser.parse_args()
+
+    chunk = make_chunk(CHUNK_SIZE)
+    for size_arg in args.sizes.split(","):
+        size = parse_size(size_arg)
+        results = {}
+        for backend in args.backends.split(","):
+            stream = RepeatingStream(chunk, size)
+            start = time.perf_counter()
+            count = count_separators_stream(stream, backend=backend)
+            elapsed = time.perf_counter() - start
+            results[backend] = count
+            rate = size / elapsed / UNITS["M"]
+            print(f"{size_arg:>6} {backend:>6}: {elapsed:8.3f}s {rate:8.1f} Mchar/s")
+        if len(set(results.values())) > 1:
+            raise SystemExit(f"Backends disagree on {size_arg}: {results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark docstract's line tokenizer on a synthetic export.
+
+Compares labelling every line with the old per-line predicates (string
+patterns through re.match/re.findall, several calls per line) against
+the single compiled LINE_RE scan, then times each docstract mode, and
+indexing the lines of the raw export with MappedLines, both as is and
+with large inline images between its sections.
+
+    python bench_docstract.py
+    python bench_docstract.py --lines 200000 --repeat 3
+    python bench_docstract.py --images 100 --image-size 2000000
+"""
+
+import argparse
+import random
+import re
+import time
+
+import docstract
+
+
+def make_export(num_lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = ["**ABSTRACT**", "An abstract.", "Words: 3", ""]
+    section = subsection = note = 0
+    while len(lines) + note < num_lines:
+        roll = rng.random()
+        if roll < 0.01:
+            section += 1
+            subsection = 0
+            lines.append(f"# {section}\\. Section {section}")
+        elif roll < 0.03 and section:
+            subsection += 1
+            lines.append(f"#### {section}.{subsection} Subsection")
+        elif roll < 0.04:
+            lines.append("![][image1]")
+            lines.append("[image1]: <data:image/png;base64," + "A" * 200 + ">")
+        elif roll < 0.05:
+            lines.append("Thesis statement for this part.")
+        elif roll < 0.3:
+            note += 1
+            lines.append(f"Body text with a citation[^{note}] and more words.")
+        else:
+            lines.append("Body text " * rng.randint(1, 10))
+    for n in range(1, note + 1):
+        lines.append(f"[^{n}]: Footnote {n} text.")
+    return "\n".join(lines) + "\n"
+
+
+def make_image_export(num_images: int, image_size: int) -> str:
+    """Exports interleaved with base64 images of ``image_size`` bytes."""
+    parts = []
+    for n in range(num_images):
+        parts.append(make_export(1000, seed=n))
+        parts.append(f"[image{n}]: <data:image/png;base64,{'A' * image_size}>\n")
+    return "".join(parts)
+
+
+def label_with_predicates(lines):
+    """The pre-tokenizer approach: one uncompiled pattern per predicate."""
+    for line in lines:
+        stripped = line.strip()
+        re.match(r"^#+\s+(\d+)\\.", stripped)
+        re.match(r"^#+\s+(\d+.\d+)", stripped)
+        "Thesis " in stripped
+        if stripped.startswith("[^"):
+            re.match(r"\[\^(\d+)\]:\s*(.+)", line)
+        if "[^" in line:
+            re.findall(r"\[\^(\d+)\]", line)
+        re.match(r"^Words:\s*\d+", stripped)
+        "<data:image" in line
+
+
+def label_with_tokenizer(lines):
+    for _ in docstract.tokenize(lines):
+        pass
+
+
+def best_of(repeat, func, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--image-size", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    text = make_export(args.lines)
+    lines = text.splitlines(keepends=True)
+    print(f"{len(lines)} lines, {len(text) / 1e6:.1f} MB")
+    with_images = make_image_export(args.images, args.image_size).encode()
+    print(f"with images: {len(with_images) / 1e6:.1f} MB")
+
+    timings = [
+        ("predicates", label_with_predicates, lines),
+        ("tokenizer", label_with_tokenizer, lines),
+        ("--outline", docstract.extract_outline, text),
+        ("--count", docstract.word_count_segmented, text),
+        ("--abstract", docstract.extract_abstract, text),
+        ("--section 3", lambda t: docstract.extract_section(t, "3"), text),
+        ("mapped", docstract.MappedLines, text.encode()),
+        ("mapped+img", docstract.MappedLines, with_images),
+    ]
+    for name, func, arg in timings:
+        elapsed = best_of(args.repeat, func, arg)
+        print(f"{name:>12}: {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
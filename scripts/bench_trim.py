@@ -0,0 +1,85 @@
+"""
+Benchmark trim on synthetic padded lines.
+
+Compares the old per-line loop (text decoding and a print call per
+line) against the chunked byte-level trim_stream, on ASCII input and on
+input with some non-ASCII text, and with --squeeze-blank.
+
+    python bench_trim.py
+    python bench_trim.py --size 200M
+"""
+
+import argparse
+import importlib.machinery
+import importlib.util
+import io
+import pathlib
+import random
+import time
+
+SCRIPT_PATH = pathlib.Path(__file__).with_name("trim")
+LOADER = importlib.machinery.SourceFileLoader("trim", str(SCRIPT_PATH))
+trim = importlib.util.module_from_spec(importlib.util.spec_from_loader("trim", LOADER))
+LOADER.exec_module(trim)
+
+UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(text: str) -> int:
+    unit = UNITS.get(text[-1].upper())
+    if unit is None:
+        return int(text)
+    return int(text[:-1]) * unit
+
+
+def make_input(size: int, words: list[str], seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    lines = []
+    length = 0
+    while length < size:
+        line = (
+            " " * rng.randint(0, 8)
+            + " ".join(rng.choices(words, k=rng.randint(0, 12)))
+            + " \t" * rng.randint(0, 3)
+            + "\n"
+        )
+        lines.append(line)
+        length += len(line)
+    return "".join(lines).encode()
+
+
+def trim_with_print(stream, out):
+    """The pre-chunking trim: decode, then print each stripped line."""
+    for line in io.TextIOWrapper(stream, encoding="utf-8"):
+        print(line.strip(), file=out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="50M", help="Input size (default: 50M).")
+    args = parser.parse_args()
+    size = parse_size(args.size)
+
+    inputs = [
+        ("ascii", make_input(size, ["lorem", "ipsum", "dolor", "sit", "amet"])),
+        ("unicode", make_input(size, ["lorem", "ipsum", "déjà", "vu", "naïve"])),
+    ]
+    for name, data in inputs:
+        runs = [
+            ("print", lambda: trim_with_print(io.BytesIO(data), io.StringIO())),
+            ("stream", lambda: trim.trim_stream(io.BytesIO(data), io.BytesIO())),
+            (
+                "stream -s",
+                lambda: trim.trim_stream(io.BytesIO(data), io.BytesIO(), squeeze=True),
+            ),
+        ]
+        for run_name, run in runs:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            rate = len(data) / elapsed / UNITS["M"]
+            print(f"{name:>8} {run_name:>10}: {elapsed:7.3f}s {rate:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
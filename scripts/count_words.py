@@ -9,19 +9,52 @@ By default a “separator” is either:
 Feed a file through stdin:
 
     cat myfile.txt | python count_spaces.py
+
+Or count many files on several cores:
+
+    python count_words.py --jobs 8 --total manuscripts/*.md
 """
 
-import sys
 import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, TextIO
 
 # Characters to treat as word separators
 WORD_SEPARATORS = [" ", "\n", "–", "—"]
 
+# Characters read per chunk when streaming
+CHUNK_SIZE = 1 << 20
+
+# Files larger than this are split into pieces of about this size when
+# counting with several jobs
+SPLIT_SIZE = 64 << 20
 
-def count_separators(text: str) -> int:
+# Inputs shorter than this are counted with the plain loop, which beats
+# the bytes backend's fixed encode/translate overhead on tiny strings
+BYTES_BACKEND_MIN_SIZE = 256
+
+# The bytes backend rewrites every separator to a space, maps every other
+# byte to "x", and then counts "x " pairs: one per run of separators.
+# UTF-8 is self-synchronising, so replacing the encoded multi-byte
+# separators can never match inside some other character.
+_SPACE = b" "
+_MULTI_BYTE_SEPARATORS = [
+    sep.encode() for sep in WORD_SEPARATORS if len(sep.encode()) > 1
+]
+_SEPARATOR_TABLE = bytes(
+    ord(_SPACE) if b < 0x80 and chr(b) in WORD_SEPARATORS else ord("x")
+    for b in range(256)
+)
+
+
+def _count_loop(text: str, prev_is_sep: bool) -> tuple[int, bool]:
+    """Count separator runs in ``text`` given the state left by the
+    previous chunk; return the count and the state for the next one."""
     wanted = set(WORD_SEPARATORS)
     count = 0
-    prev_is_sep = False
     for ch in text:
         if ch in wanted:
             if not prev_is_sep:
@@ -29,8 +62,144 @@ def count_separators(text: str) -> int:
                 prev_is_sep = True
         else:
             prev_is_sep = False
+    return count, prev_is_sep
+
+
+def _count_bytes(text: str, prev_is_sep: bool) -> tuple[int, bool]:
+    """Same contract as ``_count_loop``, done with C-level bytes methods."""
+    data = text.encode("utf-8", "surrogatepass")
+    for sep in _MULTI_BYTE_SEPARATORS:
+        data = data.replace(sep, _SPACE)
+    data = data.translate(_SEPARATOR_TABLE)
+    count = data.count(b"x ")
+    if data[:1] == _SPACE and not prev_is_sep:
+        count += 1
+    if data:
+        prev_is_sep = data[-1:] == _SPACE
+    return count, prev_is_sep
+
+
+BACKENDS = {
+    "loop": _count_loop,
+    "bytes": _count_bytes,
+}
+
+
+def _count_chunk(
+    text: str, prev_is_sep: bool, backend: str | None = None
+) -> tuple[int, bool]:
+    if backend is None:
+        backend = "bytes" if len(text) >= BYTES_BACKEND_MIN_SIZE else "loop"
+    return BACKENDS[backend](text, prev_is_sep)
+
+
+def count_separators(text: str, backend: str | None = None) -> int:
+    count, _ = _count_chunk(text, False, backend)
     return count
 
+
+def count_separators_stream(
+    stream: TextIO,
+    chunk_size: int = CHUNK_SIZE,
+    backend: str | None = None,
+    prev_is_sep: bool = False,
+) -> int:
+    """Like ``count_separators`` but reads ``stream`` in fixed-size chunks,
+    so memory use does not grow with the input. ``prev_is_sep`` says
+    whether the text just before ``stream`` ended in a separator."""
+    count = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return count
+        chunk_count, prev_is_sep = _count_chunk(chunk, prev_is_sep, backend)
+        count += chunk_count
+
+
+def split_points(fname: str, piece_size: int = SPLIT_SIZE) -> list[int]:
+    """
+    Byte offsets that cut ``fname`` into pieces of roughly ``piece_size``.
+    Every cut falls just after an ASCII separator byte, so it never splits
+    a UTF-8 character or a CRLF pair, and the text before each cut always
+    ends in a separator.
+    """
+    size = os.path.getsize(fname)
+    points = [0]
+    with open(fname, "rb") as f:
+        offset = piece_size
+        while offset < size:
+            f.seek(offset)
+            while True:
+                block = f.read(CHUNK_SIZE)
+                if not block:
+                    return points
+                cut = min(
+                    (i for i in (block.find(b" "), block.find(b"\n")) if i != -1),
+                    default=-1,
+                )
+                if cut != -1:
+                    break
+                offset += len(block)
+            offset += cut + 1
+            if offset < size:
+                points.append(offset)
+            offset += piece_size
+    return points
+
+
+def _count_piece(fname: str, start: int, end: int | None, backend: str | None) -> int:
+    """Count separators in bytes ``start:end`` of ``fname`` (a whole file
+    when ``start`` is 0 and ``end`` is None)."""
+    if start == 0 and end is None:
+        with open(fname, "r", encoding="utf-8") as f:
+            return count_separators_stream(f, backend=backend)
+    with open(fname, "rb") as f:
+        f.seek(start)
+        data = f.read(-1 if end is None else end - start)
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+    # Pieces after the first begin right after a separator
+    return count_separators_stream(stream, backend=backend, prev_is_sep=start > 0)
+
+
+def count_files_parallel(
+    fnames: list[str],
+    jobs: int,
+    backend: str | None = None,
+    piece_size: int = SPLIT_SIZE,
+) -> Iterator[tuple[str, int]]:
+    """
+    Yield ``(fname, count)`` for each file, in order, counting on ``jobs``
+    worker processes. Files larger than ``piece_size`` are split at
+    separator-safe points so a single huge file can use every worker.
+    """
+    tasks = []
+    for fname in fnames:
+        if os.path.getsize(fname) > piece_size:
+            points = split_points(fname, piece_size)
+            ends = points[1:] + [None]
+            tasks.extend((fname, start, end) for start, end in zip(points, ends))
+        else:
+            tasks.append((fname, 0, None))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        counts = executor.map(
+            _count_piece,
+            [fname for fname, _, _ in tasks],
+            [start for _, start, _ in tasks],
+            [end for _, _, end in tasks],
+            [backend] * len(tasks),
+        )
+        current, total = None, 0
+        for (fname, start, _), count in zip(tasks, counts):
+            if start == 0 and current is not None:
+                yield current, total
+                total = 0
+            current = fname
+            total += count
+        if current is not None:
+            yield current, total
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Count spaces and dash-like word dividers."
@@ -40,16 +209,41 @@ def main() -> None:
         nargs="*",
         help="Input file(s) to process. If none are given, reads from stdin."
     )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        help="Counting backend (default: picked by input size).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes to count files with.",
+    )
+    parser.add_argument(
+        "--total",
+        action="store_true",
+        help="Print a final line summing the per-file counts.",
+    )
     args = parser.parse_args()
 
     if args.files:
-        for fname in args.files:
-            with open(fname, "r", encoding="utf-8") as f:
-                text = f.read()
-            print(f"{fname}: {count_separators(text)}")
+        if args.jobs > 1:
+            results = count_files_parallel(args.files, args.jobs, args.backend)
+        else:
+            results = (
+                (fname, _count_piece(fname, 0, None, args.backend))
+                for fname in args.files
+            )
+        total = 0
+        for fname, count in results:
+            print(f"{fname}: {count}")
+            total += count
+        if args.total:
+            print(f"Total: {total}")
     else:
-        text = sys.stdin.read()
-        print(count_separators(text))
+        print(count_separators_stream(sys.stdin, backend=args.backend))
 
 
 if __name__ == "__main__":
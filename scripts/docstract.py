@@ -10,16 +10,109 @@ $ docstract -i "$(last-download.sh)" -s6 | pbcopy
 
 # Print outline of all headings:
 $ docstract -i "$(last-download.sh)" -o
+
+# Write several sections (with their footnotes) to separate files:
+$ docstract -i "$(last-download.sh)" --sections 1,2,3.1 --out-dir chapters
+
+# Keep a running word count while re-exporting the doc:
+$ docstract -i export.md -c --watch
+
+Results are cached under ~/.cache/docstract, keyed by the input's
+content, so re-running on an unchanged export skips parsing. Pass
+--no-cache to bypass the cache.
 """
 
 import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import io
+import mmap
 import os
+import pickle
 import re
+import struct
 import sys
-from typing import Dict, NamedTuple
+import tempfile
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import ChainMap
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 from count_words import count_separators
 
+HEADING_RE = re.compile(r"^#+\s+(\d+)\\.")
+SUBHEADING_RE = re.compile(r"^#+\s+(\d+.\d+)")
+FOOTNOTE_DEF_RE = re.compile(r"\[\^(\d+)\]:\s*(.+)")
+FOOTNOTE_REF_RE = re.compile(r"\[\^(\d+)\]")
+
+# Labels a line in one match against the unstripped line. The leading
+# \s* and the lookahead after a heading's "\." stand in for str.strip();
+# a footnote only counts as a definition when it has no indent and some
+# text after the colon, as FOOTNOTE_DEF_RE.match(line) requires.
+LINE_RE = re.compile(
+    r"""
+    (?P<indent>\s*)
+    (?:
+        \#+\s+(?P<heading>\d+)\\(?=\s*\S)
+      | \#+\s+(?P<subheading>\d+.\d+)
+      | \[\^(?P<note>\d+)\]:(?P<note_text>\s*.+)?
+      | (?P<abstract>\*\*ABSTRACT\*\*\s*\Z)
+      | (?P<words>Words:\s*\d+)
+    )
+    """,
+    re.VERBOSE,
+)
+
+# Everything besides "\n" that str.splitlines() treats as a line boundary,
+# as UTF-8 bytes ("\r\n" comes first so it stays a single boundary)
+OTHER_LINE_END_RE = re.compile(
+    rb"\r\n|[\r\x0b\x0c\x1c-\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]"
+)
+NEWLINE_RE = re.compile(rb"\n")
+# The last byte of each line end OTHER_LINE_END_RE matches, and how many
+# bytes before it that line end starts. Finding these bytes with find
+# (memchr) and matching only there is far faster than running the regex
+# over every byte.
+OTHER_LINE_END_BYTES = (
+    (b"\r", 0),
+    (b"\x0b", 0),
+    (b"\x0c", 0),
+    (b"\x1c", 0),
+    (b"\x1d", 0),
+    (b"\x1e", 0),
+    (b"\x85", 1),
+    (b"\xa8", 2),
+    (b"\xa9", 2),
+)
+IMAGE_MARKER = b"<data:image"
+# MappedLines decodes up to this many adjacent lines with one decode call
+DECODE_BLOCK_LINES = 1 << 12
+
+# Line kinds produced by tokenize()
+TEXT = "text"
+HEADING = "heading"
+SUBHEADING = "subheading"
+FOOTNOTE_DEF = "footnote_def"
+FOOTNOTE_MARK = "footnote_mark"  # "[^N]:" that isn't a usable definition
+ABSTRACT = "abstract"
+WORDS = "words"
+
+# Bump when the shape of anything stored in the cache changes
+CACHE_VERSION = 2
+CACHE_MAX_BYTES = 256 << 20
+
+# --watch: inotify flags from <sys/inotify.h>, and the polling fallback
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+INOTIFY_EVENT_SIZE = struct.calcsize("iIII")
+POLL_INTERVAL = 1.0
+
+# Buffer size for the files written by --sections/--all-sections
+WRITE_BUFFER_SIZE = 1 << 20
+
 
 class SectionCount(NamedTuple):
     count: int
@@ -36,14 +129,14 @@ def is_bold(text):
 
 
 def is_heading(text):
-    match = re.match(r"^#+\s+(\d+)\\.", text)
+    match = HEADING_RE.match(text)
     if match:
         return match.group(1)
     return None
 
 
 def is_subheading(text):
-    match = re.match(r"^#+\s+(\d+.\d+)", text)
+    match = SUBHEADING_RE.match(text)
     if match:
         return match.group(1)
     return None
@@ -55,51 +148,338 @@ def is_thesis_statement(text):
     return None
 
 
-def get_section(lines, section_number):
+class MappedLines(Sequence):
+    """
+    The lines of a UTF-8 export held in ``data`` (typically an mmap),
+    indexed by byte offsets and decoded, a block at a time, only when
+    accessed. Lines holding
+    inline ``<data:image`` blobs are skipped without being decoded, so
+    unlike with a list of lines they never reach the outline or abstract.
+
+    Lines come out as ``open(path).read().splitlines(keepends=True)``
+    would give them, including the universal newline translation.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        # Line ends are found with C-level scans of the text between inline
+        # images; the images' base64 payloads, most of the bytes of such an
+        # export, are skipped rather than searched for line breaks.
+        markers = []
+        ends = array("Q")
+        pos = 0
+        while pos < len(data):
+            marker = data.find(IMAGE_MARKER, pos)
+            if marker == -1:
+                ends.extend(_line_ends(data, pos, len(data)))
+                break
+            ends.extend(_line_ends(data, pos, marker))
+            markers.append(marker)
+            pos = _data_uri_end(data, marker)
+        if len(data) > (ends[-1] if ends else 0):
+            ends.append(len(data))
+        starts = array("Q", [0]) + ends[:-1] if ends else array("Q")
+        # Lines that don't directly follow the line before them, and so
+        # can't be decoded in one block with it
+        self.gaps = []
+        if not markers:
+            self.starts = starts
+            self.ends = ends
+            return
+        # Drop each line holding a marker (the one ending after it)
+        self.starts = array("Q")
+        self.ends = array("Q")
+        prev = 0
+        for image in sorted({bisect_right(ends, marker) for marker in markers}):
+            self.starts.extend(starts[prev:image])
+            self.ends.extend(ends[prev:image])
+            self.gaps.append(len(self.ends))
+            prev = image + 1
+        self.starts.extend(starts[prev:])
+        self.ends.extend(ends[prev:])
+
+    def _decode(self, start, end):
+        line = self.data[start:end].decode("utf-8")
+        if line.endswith("\r\n"):
+            return line[:-2] + "\n"
+        if line.endswith("\r"):
+            return line[:-1] + "\n"
+        return line
+
+    def _lines(self, lo, hi):
+        """Yield lines ``lo`` to ``hi``, decoding adjacent ones in blocks."""
+        splits = self.gaps[bisect_right(self.gaps, lo) : bisect_left(self.gaps, hi)]
+        for start, stop in zip([lo] + splits, splits + [hi]):
+            for block in range(start, stop, DECODE_BLOCK_LINES):
+                end = min(block + DECODE_BLOCK_LINES, stop)
+                text = self.data[self.starts[block] : self.ends[end - 1]].decode()
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+                yield from text.splitlines(keepends=True)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1:
+                return list(self._lines(start, stop)) if start < stop else []
+            return [
+                self._decode(start, end)
+                for start, end in zip(self.starts[i], self.ends[i])
+            ]
+        return self._decode(self.starts[i], self.ends[i])
+
+    def __iter__(self):
+        return self._lines(0, len(self))
+
+    def __reduce__(self):
+        # Pickle (for the cache) as a plain list: an mmap can't be pickled
+        return list, (list(self),)
+
+
+def _line_ends(data, start, stop):
+    """
+    The end offsets of the lines of ``data[start:stop]``, for every line
+    break ``str.splitlines()`` knows, in order.
+    """
+    ends = [match.end() for match in NEWLINE_RE.finditer(data, start, stop)]
+    other = set()
+    for byte, back in OTHER_LINE_END_BYTES:
+        pos = data.find(byte, start, stop)
+        while pos != -1:
+            match = OTHER_LINE_END_RE.match(data, pos - back) if pos >= back else None
+            if match and match.end() > pos:
+                other.add(match.end())
+            pos = data.find(byte, pos + 1, stop)
+    if other:
+        # A "\r\n" is found both ways; the set keeps it a single line end
+        return sorted(other.union(ends))
+    return ends
+
+
+def _data_uri_end(data, marker):
+    """
+    Where the inline image starting at ``marker`` ends: after its closing
+    ">" on the same "\n" line. Its base64 payload holds no line breaks,
+    so it is never searched for them. Without a ">", only the marker
+    itself is skipped.
+    """
+    newline = data.find(b"\n", marker)
+    close = data.find(b">", marker, len(data) if newline == -1 else newline)
+    return marker + len(IMAGE_MARKER) if close == -1 else close + 1
+
+
+def iter_lines(path):
+    """
+    Yield the lines of ``path`` as ``open(path).read().splitlines(True)``
+    would give them, but reading only as far as the caller consumes.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            # Universal newlines end each line at a "\n"; split the rest
+            yield from line.splitlines(keepends=True)
+
+
+def map_file(path):
+    """Memory-map ``path`` read-only (mmap can't map an empty file)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class LineToken(NamedTuple):
+    kind: str
+    number: Optional[str]  # heading, subheading or footnote number
+    line: str
+    is_image: bool  # inline base64 image; excluded from section text
+    is_thesis: bool
+    refs: List[int]  # footnote numbers referenced on the line
+
+
+def label(line) -> Tuple[str, Optional[str]]:
+    """Return the kind of ``line`` and its number, using a single regex match."""
+    match = LINE_RE.match(line)
+    if not match:
+        return TEXT, None
+    # The last group to close is the matched branch's own group,
+    # named after its kind (or "note"/"note_text" for footnotes)
+    kind = match.lastgroup
+    if kind == "note_text" or kind == "note":
+        if match.group("indent") or match.group("note_text") is None:
+            return FOOTNOTE_MARK, match.group("note")
+        return FOOTNOTE_DEF, match.group("note")
+    if kind == HEADING or kind == SUBHEADING:
+        return kind, match.group(kind)
+    return kind, None
+
+
+def footnote_refs(line) -> List[int]:
+    if "[^" not in line:
+        return []
+    return list(map(int, FOOTNOTE_REF_RE.findall(line)))
 
-    section_start = -1
-    section_end = -1
-    filtered_lines = [line for line in lines if "<data:image" not in line]
-    is_subsection = "." in section_number
 
-    for i, line in enumerate(filtered_lines):
-        stripped = line.strip()
-        # Check for the start of the footnotes, indicating the main
-        # text of the article has ended.
-        if stripped.startswith("[^1]:"):
-            if section_start != -1:
-                section_end = i
-                break
-            else:
-                # Footnotes reached before target section found
-                return []
+def is_thesis_line(line):
+    return "Thesis " in line and "Thesis " in line.strip()
 
-        candidate = is_subheading(stripped) if is_subsection else is_heading(stripped)
 
-        if candidate is None:
-            # A top-level heading always ends an in-progress subsection
-            if (
-                is_subsection
-                and section_start != -1
-                and is_heading(stripped) is not None
-            ):
-                section_end = i
-                break
+def tokenize(lines) -> Iterator[LineToken]:
+    """Label each line with its kind, using a single regex match."""
+    for line in lines:
+        kind, number = label(line)
+        yield LineToken(
+            kind,
+            number,
+            line,
+            "<data:image" in line,
+            is_thesis_line(line),
+            footnote_refs(line),
+        )
+
+
+class DocumentIndex(NamedTuple):
+    """Everything the extraction modes need, gathered in one pass."""
+
+    lines: Sequence[str]  # document lines with image lines removed
+    spans: Dict[str, Tuple[int, int]]  # section number -> (start, end) in lines
+    references: Dict[str, List[int]]  # section number -> referenced footnotes
+    footnotes: Dict[int, str]  # footnote number -> definition text
+    sections: List[Tuple[str, List[str]]]  # (section, [subsections]) in order
+    outline: List[str]
+    abstract: str
+
+    def section(self, section_number):
+        span = self.spans.get(section_number)
+        if span is None:
+            return []
+        start, end = span
+        return self.lines[start:end]
+
+    def section_footnotes(self, section_number):
+        return [
+            self.footnotes[note]
+            for note in self.references.get(section_number, [])
+            if note in self.footnotes
+        ]
+
+
+def build_index(lines) -> DocumentIndex:
+    """
+    Scan ``lines`` once, recording where every section and subsection
+    starts and ends, the footnote definitions, which footnotes each
+    section references, the outline and the abstract.
+
+    ``lines`` may be a ``MappedLines``, which has no image lines to drop;
+    the index then keeps it as is rather than copying every line.
+    """
+    mapped = isinstance(lines, MappedLines)
+    filtered_lines = []
+    num_lines = 0
+    spans = {}
+    footnotes = {}
+    sections = []
+    outline = []
+    abstract_lines = []
+    in_abstract = False
+    ref_lines = []  # (index into filtered_lines, [footnote numbers])
+    body_end = None  # first "[^1]:" line; sections never extend past it
+    open_section = None  # [section number, start]
+    open_subsection = None
+
+    def close(open_span, end, is_subsection=False):
+        # Only numbers containing "." are looked up as subsections, so a
+        # subheading match without one must not shadow a top-level section.
+        if open_span is not None and is_subsection == ("." in open_span[0]):
+            spans.setdefault(open_span[0], (open_span[1], end))
+
+    # Lines are labelled here rather than through tokenize(): building a
+    # LineToken for every line costs more than the labelling itself
+    for line in lines:
+        kind, number = label(line)
+
+        if kind == HEADING:
+            outline.append(line)
+            sections.append((number, []))
+        elif kind == SUBHEADING:
+            outline.append("    " + line)
+            if sections and number.startswith(sections[-1][0] + "."):
+                sections[-1][1].append(number)
+        elif is_thesis_line(line):
+            outline.append("    " + line)
+
+        if in_abstract:
+            abstract_lines.append(line)
+            in_abstract = kind != WORDS
+        elif not abstract_lines and kind == ABSTRACT:
+            abstract_lines.append(line)
+            in_abstract = True
+
+        if kind == FOOTNOTE_DEF:
+            footnotes[int(number)] = line.strip()
+
+        if not mapped and "<data:image" in line:
+            continue
+        i = num_lines
+        num_lines += 1
+        if not mapped:
+            filtered_lines.append(line)
+        if body_end is not None:
             continue
 
-        if candidate == section_number:
-            section_start = i
-        elif section_start != -1:
-            # We found a new heading after our target section started
-            section_end = i
-            break
+        if number == "1" and (kind == FOOTNOTE_DEF or kind == FOOTNOTE_MARK):
+            body_end = i
+            close(open_section, i)
+            close(open_subsection, i, is_subsection=True)
+            open_section = open_subsection = None
+            continue
 
-    if section_start == -1:
-        return []
-    if section_end == -1:
-        section_end = len(filtered_lines)
+        if "[^" in line:
+            refs = footnote_refs(line)
+            if refs:
+                ref_lines.append((i, refs))
+
+        if kind == HEADING:
+            if open_section is not None and open_section[0] == number:
+                open_section[1] = i
+            else:
+                close(open_section, i)
+                open_section = [number, i]
+            # A top-level heading always ends an in-progress subsection
+            close(open_subsection, i, is_subsection=True)
+            open_subsection = None
+        elif kind == SUBHEADING:
+            if open_subsection is not None and open_subsection[0] == number:
+                open_subsection[1] = i
+            else:
+                close(open_subsection, i, is_subsection=True)
+                open_subsection = [number, i]
+
+    end = num_lines if body_end is None else body_end
+    close(open_section, end)
+    close(open_subsection, end, is_subsection=True)
+
+    ref_starts = [i for i, _ in ref_lines]
+    references = {}
+    for number, (start, end) in spans.items():
+        lo = bisect_left(ref_starts, start)
+        hi = bisect_left(ref_starts, end)
+        references[number] = [n for _, notes in ref_lines[lo:hi] for n in notes]
+
+    return DocumentIndex(
+        lines=lines if mapped else filtered_lines,
+        spans=spans,
+        references=references,
+        footnotes=footnotes,
+        sections=sections,
+        outline=outline,
+        abstract="".join(abstract_lines),
+    )
 
-    return filtered_lines[section_start:section_end]
+
+def get_section(lines, section_number):
+    return build_index(lines).section(section_number)
 
 
 def get_footnotes(section, lines):
@@ -108,7 +488,7 @@ def get_footnotes(section, lines):
     for i, line in enumerate(lines):
         if not line.strip().startswith("[^"):
             continue
-        match = re.match(r"\[\^(\d+)\]:\s*(.+)", line)
+        match = FOOTNOTE_DEF_RE.match(line)
         if not match:
             continue
         note_number, note_text = match.group(1), match.group(0)
@@ -116,73 +496,73 @@ def get_footnotes(section, lines):
     for i, line in enumerate(section):
         if "[^" not in line:
             continue
-        matches = re.findall(r"\[\^(\d+)\]", line)
+        matches = FOOTNOTE_REF_RE.findall(line)
         for match in matches:
             if int(match) in footnotes:
                 to_return.append(footnotes[int(match)])
     return to_return
 
 
+def read_outline(lines):
+    """The outline ``build_index(lines)`` gives, from its labelling alone."""
+    outline = []
+    for line in lines:
+        kind, _ = label(line)
+        if kind == HEADING:
+            outline.append(line)
+        elif kind == SUBHEADING or is_thesis_line(line):
+            outline.append("    " + line)
+    return "".join(outline)
+
+
 def extract_outline(markdown_text):
     """Extract and return all heading lines from the markdown text."""
-    lines = markdown_text.splitlines(keepends=True)
-    outline_lines = []
-    for line in lines:
-        stripped = line.strip()
-        if is_heading(stripped):
-            outline_lines.append(line)
-            continue
-        if is_subheading(stripped):
-            outline_lines.append("    " + line)
-            continue
-        if is_thesis_statement(stripped):
-            outline_lines.append("    " + line)
-    return "".join(outline_lines)
+    return read_outline(markdown_text.splitlines(keepends=True))
 
 
 def word_count_from_chapter_one(markdown_text):
     lines = markdown_text.splitlines(keepends=True)
-    for i, line in enumerate(lines):
-        if is_heading(line.strip()) == "1":
+    for i, token in enumerate(tokenize(lines)):
+        if token.kind == HEADING and token.number == "1":
             body = "".join(lines[i:])
             return count_separators(body)
     return 0
 
 
-def _section_word_count(section_number, lines):
-    """Count words in a section (or subsection) including its footnotes."""
-    section = get_section(lines, section_number)
-    footnotes = get_footnotes(section, lines)
-    return count_separators("".join(section) + "\n".join(footnotes))
+def _section_word_count(index, section_number, memo=None):
+    """
+    Count words in a section (or subsection) including its footnotes.
+    ``memo`` maps section text to its count, so a section whose text is
+    unchanged since the last count is not counted again.
+    """
+    section = index.section(section_number)
+    footnotes = index.section_footnotes(section_number)
+    text = "".join(section) + "\n".join(footnotes)
+    if memo is None:
+        return count_separators(text)
+    count = memo.get(text)
+    if count is None:
+        count = count_separators(text)
+    memo[text] = count
+    return count
 
 
 def word_count_segmented(markdown_text) -> WordCountResult:
-    lines = markdown_text.splitlines(keepends=True)
+    return word_count_from_index(build_index(markdown_text.splitlines(keepends=True)))
 
-    # Discover top-level sections and their subsections in document order
-    raw_sections = []  # list of [section_number, [subsection_numbers]]
-    current_section = None
-    for line in lines:
-        stripped = line.strip()
-        h = is_heading(stripped)
-        if h is not None:
-            current_section = h
-            raw_sections.append([h, []])
-            continue
-        s = is_subheading(stripped)
-        if s is not None and current_section is not None:
-            if s.startswith(current_section + "."):
-                raw_sections[-1][1].append(s)
 
+def word_count_from_index(index, memo=None) -> WordCountResult:
     sections = {}
     total = 0
-    for section_num, subsection_nums in raw_sections:
+    for section_num, subsection_nums in index.sections:
         if subsection_nums:
-            subsections = {s: _section_word_count(s, lines) for s in subsection_nums}
+            subsections = {
+                s: _section_word_count(index, s, memo) for s in subsection_nums
+            }
             section_total = sum(subsections.values())
         else:
             subsections = {}
-            section_total = _section_word_count(section_num, lines)
+            section_total = _section_word_count(index, section_num, memo)
         sections[section_num] = SectionCount(
             count=section_total, subsections=subsections
         )
@@ -201,39 +581,314 @@ def format_word_count(result: WordCountResult) -> str:
     return "\n".join(rows)
 
 
+def _flatten_word_count(result: WordCountResult) -> Dict[str, Tuple[str, int]]:
+    """Map each section and subsection number to its label and count."""
+    flat = {}
+    for num, section in result.sections.items():
+        flat[num] = (f"{num}.", section.count)
+        for sub_num, sub_count in section.subsections.items():
+            flat[sub_num] = (f"\t{sub_num}", sub_count)
+    return flat
+
+
+def format_word_count_delta(old: WordCountResult, new: WordCountResult) -> str:
+    """Rows for the sections whose counts differ between ``old`` and ``new``."""
+    old_flat = _flatten_word_count(old)
+    new_flat = _flatten_word_count(new)
+    rows = []
+    for num, (label, count) in new_flat.items():
+        previous = old_flat.get(num, (label, 0))[1]
+        if num not in old_flat or count != previous:
+            rows.append(f"{label} {count} ({count - previous:+d})")
+    for num, (label, count) in old_flat.items():
+        if num not in new_flat:
+            rows.append(f"{label} removed ({-count:+d})")
+    rows.append(f"Total: {new.total} ({new.total - old.total:+d})")
+    return "\n".join(rows)
+
+
+def read_abstract(lines):
+    """
+    The abstract ``build_index(lines)`` gives, reading ``lines`` only as
+    far as the abstract's 'Words: NNN' line.
+    """
+    abstract_lines = []
+    for line in lines:
+        kind, _ = label(line)
+        if abstract_lines or kind == ABSTRACT:
+            abstract_lines.append(line)
+            if kind == WORDS:
+                break
+    return "".join(abstract_lines)
+
+
 def extract_abstract(markdown_text):
     """Extract the ABSTRACT section, ending with the 'Words: NNN' line."""
-    lines = markdown_text.splitlines(keepends=True)
-    abstract_start = -1
-    for i, line in enumerate(lines):
-        if line.strip() == "**ABSTRACT**":
-            abstract_start = i
-            break
-    if abstract_start == -1:
-        return ""
-    result = []
-    for line in lines[abstract_start:]:
-        result.append(line)
-        if re.match(r"^Words:\s*\d+", line.strip()):
-            break
-    return "".join(result)
+    return read_abstract(markdown_text.splitlines(keepends=True))
+
+
+def read_section(lines, section_number):
+    """
+    Return the lines of one section and its footnotes, as ``build_index``
+    would give them, without indexing every section: once the section
+    ends, the rest of ``lines`` is only checked for footnote definitions.
+    """
+    is_subsection = "." in section_number
+    footnotes = {}
+    section = None  # lines of the section while it is open
+    found = None
+    for line in lines:
+        if found is not None:
+            # Only an unindented "[^N]:" line can be a definition
+            if line.startswith("[^"):
+                kind, number = label(line)
+                if kind == FOOTNOTE_DEF:
+                    footnotes[int(number)] = line.strip()
+            continue
+        kind, number = label(line)
+        if kind == FOOTNOTE_DEF:
+            footnotes[int(number)] = line.strip()
+        if "<data:image" in line:
+            continue
+        if number == "1" and (kind == FOOTNOTE_DEF or kind == FOOTNOTE_MARK):
+            # The body ends here, and with it any section
+            found = section or []
+            continue
+        if kind == HEADING or (is_subsection and kind == SUBHEADING):
+            if number == section_number and kind == (
+                SUBHEADING if is_subsection else HEADING
+            ):
+                # A repeated heading restarts the section, as in build_index
+                section = [line]
+                continue
+            if section is not None:
+                found = section
+                continue
+        if section is not None:
+            section.append(line)
+    if found is None:
+        found = section or []
+    refs = [note for line in found for note in footnote_refs(line)]
+    return found, [footnotes[note] for note in refs if note in footnotes]
 
 
 def extract_section(markdown_text, section_number):
     lines = markdown_text.splitlines(keepends=True)
-    section = get_section(lines, section_number)
-    footnotes = get_footnotes(section, lines)
+    return format_section(*read_section(lines, section_number))
+
+
+def section_from_index(index, section_number):
+    return format_section(
+        index.section(section_number), index.section_footnotes(section_number)
+    )
+
+
+def format_section(section, footnotes):
     if not section:
         return ""
     return "".join(section) + "\n\n" + "\n\n".join(footnotes)
 
 
+def write_sections(index, section_numbers, out_dir):
+    """
+    Write each section and its footnotes to ``out_dir/section-N.md``,
+    exactly as ``-s N`` would print it. Returns the paths written;
+    sections missing from the document are reported and skipped.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for number in section_numbers:
+        section = index.section(number)
+        if not section:
+            print(f"Section {number} not found", file=sys.stderr)
+            continue
+        path = os.path.join(out_dir, f"section-{number}.md")
+        with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(section)
+            f.write("\n\n")
+            f.write("\n\n".join(index.section_footnotes(number)))
+            f.write("\n")
+        written.append(path)
+    return written
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "docstract")
+
+
+def cache_key(data: bytes, mode: str) -> str:
+    return f"{hashlib.sha256(data).hexdigest()}-{mode}-v{CACHE_VERSION}"
+
+
+def cache_get(cache_dir, key):
+    """Return the value cached under ``key``, or None on a miss."""
+    path = os.path.join(cache_dir, key + ".pickle")
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (EOFError, pickle.UnpicklingError):
+        # A truncated or corrupt entry is just a miss
+        return None
+    # Bump the mtime so eviction sees this entry as recently used
+    os.utime(path)
+    return value
+
+
+def cache_put(cache_dir, key, value, max_bytes=CACHE_MAX_BYTES):
+    """Store ``value`` under ``key``, then evict the least recently used
+    entries until the cache fits in ``max_bytes``."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, os.path.join(cache_dir, key + ".pickle"))
+
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".pickle"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def cached(data: bytes, mode, compute, cache_dir=None):
+    """Return ``compute()``, reusing an earlier result for the same input
+    bytes and mode when one is cached. Pass ``cache_dir=None`` to bypass."""
+    if cache_dir is None:
+        return compute()
+    key = cache_key(data, mode)
+    value = cache_get(cache_dir, key)
+    if value is None:
+        value = compute()
+        cache_put(cache_dir, key, value)
+    return value
+
+
+def _inotify_changes(path):
+    """Yield whenever ``path`` is rewritten or replaced, using inotify."""
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    fd = libc.inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    try:
+        # Watch the directory: exports are often replaced, not rewritten
+        directory, name = os.path.split(os.path.abspath(path))
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed", directory)
+        while True:
+            buf = os.read(fd, 64 * 1024)
+            offset = 0
+            changed = False
+            while offset < len(buf):
+                _, _, _, length = struct.unpack_from("iIII", buf, offset)
+                offset += INOTIFY_EVENT_SIZE
+                event_name = buf[offset : offset + length].rstrip(b"\0")
+                offset += length
+                changed = changed or os.fsdecode(event_name) == name
+            if changed:
+                yield
+    finally:
+        os.close(fd)
+
+
+def _polled_changes(path, interval):
+    """Yield whenever the size or mtime of ``path`` changes."""
+
+    def signature():
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    last = signature()
+    while True:
+        time.sleep(interval)
+        current = signature()
+        if current is not None and current != last:
+            last = current
+            yield
+
+
+def watch_changes(path, interval=POLL_INTERVAL):
+    """Yield each time ``path`` changes: inotify on Linux, polling elsewhere."""
+    if sys.platform.startswith("linux"):
+        try:
+            yield from _inotify_changes(path)
+            return
+        except (AttributeError, OSError):
+            # No usable inotify (e.g. libc without it); fall back to polling
+            pass
+    yield from _polled_changes(path, interval)
+
+
+def watch_word_count(path):
+    """
+    Print the word count of ``path``, then, each time it changes, the
+    sections whose counts moved. Unchanged sections are not re-counted.
+    """
+    memo = {}
+    with open(path, "rb") as f:
+        data = f.read()
+    index = build_index(decode_markdown(data).splitlines(keepends=True))
+    result = word_count_from_index(index, memo)
+    print(format_word_count(result), flush=True)
+    for _ in watch_changes(path):
+        try:
+            with open(path, "rb") as f:
+                new_data = f.read()
+            text = decode_markdown(new_data)
+        except (FileNotFoundError, UnicodeDecodeError):
+            # Caught mid-write; the next change event will pick it up
+            continue
+        if new_data == data:
+            continue
+        data = new_data
+        index = build_index(text.splitlines(keepends=True))
+        # Read through to the previous counts but keep only the sections
+        # present now, so the memo doesn't grow with every edit
+        fresh = {}
+        new_result = word_count_from_index(index, ChainMap(fresh, memo))
+        memo = fresh
+        print(time.strftime("--- %H:%M:%S"))
+        print(format_word_count_delta(result, new_result), flush=True)
+        result = new_result
+
+
+def decode_markdown(data: bytes) -> str:
+    """Decode the raw export exactly as ``open(..., "r")`` would."""
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8").read()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Extract a markdown section and its footnotes, or print an outline."
     )
     parser.add_argument("-i", "--input", required=True, help="Input markdown file")
     parser.add_argument("-s", "--section", help="Section number to extract (e.g., '2')")
+    parser.add_argument(
+        "--sections",
+        help="Comma-separated sections to write to --out-dir (e.g., '1,2,3.1')",
+    )
+    parser.add_argument(
+        "--all-sections",
+        action="store_true",
+        help="Write every top-level section to --out-dir",
+    )
+    parser.add_argument(
+        "--out-dir",
+        default=".",
+        help="Directory for --sections/--all-sections files (default: .)",
+    )
     parser.add_argument(
         "-o", "--outline", action="store_true", help="Print outline of all headings"
     )
@@ -243,28 +898,93 @@ if __name__ == "__main__":
     parser.add_argument(
         "-a", "--abstract", action="store_true", help="Extract the ABSTRACT section"
     )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore and don't update the cache"
+    )
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="With --count, re-count whenever the input changes",
+    )
 
     args = parser.parse_args()
 
     # Validate that exactly one mode is selected
-    modes = [args.outline, bool(args.section), args.count, args.abstract]
+    modes = [
+        args.outline,
+        bool(args.section),
+        args.count,
+        args.abstract,
+        bool(args.sections),
+        args.all_sections,
+    ]
     if sum(modes) > 1:
-        parser.error("Cannot specify more than one of --outline, --section, --count")
+        parser.error(
+            "Cannot specify more than one of --outline, --section, --count,"
+            " --abstract, --sections, --all-sections"
+        )
     if sum(modes) == 0:
-        parser.error("Must specify one of --outline, --section, or --count")
+        parser.error(
+            "Must specify one of --outline, --section, --count, --abstract,"
+            " --sections, or --all-sections"
+        )
+    if args.watch and not args.count:
+        parser.error("--watch only works with --count")
+
+    if args.watch:
+        try:
+            watch_word_count(args.input)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
+    input_data = map_file(args.input)
+    cache_dir = None if args.no_cache else default_cache_dir()
 
-    with open(args.input, "r", encoding="utf-8") as f:
-        input_markdown = f.read()
+    def load_index():
+        return build_index(MappedLines(input_data))
 
+    # The single-result modes read no more of the export than they need;
+    # the others build the full index
     if args.outline:
-        result = extract_outline(input_markdown)
+        result = cached(
+            input_data,
+            "outline",
+            lambda: read_outline(MappedLines(input_data)),
+            cache_dir,
+        )
         print(result)
     elif args.count:
-        result = format_word_count(word_count_segmented(input_markdown))
-        print(result)
+        count = cached(
+            input_data, "count", lambda: word_count_from_index(load_index()), cache_dir
+        )
+        print(format_word_count(count))
     elif args.abstract:
-        result = extract_abstract(input_markdown)
+        result = cached(
+            input_data,
+            "abstract",
+            lambda: read_abstract(
+                line for line in iter_lines(args.input) if "<data:image" not in line
+            ),
+            cache_dir,
+        )
         print(result)
+    elif args.sections or args.all_sections:
+        index = cached(input_data, "index", load_index, cache_dir)
+        if args.all_sections:
+            numbers = [number for number, _ in index.sections]
+        else:
+            numbers = [n.strip() for n in args.sections.split(",") if n.strip()]
+        for path in write_sections(index, numbers, args.out_dir):
+            print(path)
     else:
-        result = extract_section(input_markdown, args.section)
+        result = cached(
+            input_data,
+            f"section-{args.section}",
+            lambda: format_section(
+                *read_section(MappedLines(input_data), args.section)
+            ),
+            cache_dir,
+        )
         print(result)
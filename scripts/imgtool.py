@@ -9,10 +9,13 @@ Some subcommands require more prerequisites. See docstrings.
 '''
 
 import argparse
+import collections
+import io
 import os
 import shutil
 import sys
-import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 
 try:
@@ -21,16 +24,135 @@ except ModuleNotFoundError:
     sys.exit('Error: PIL or Pillow required')
 
 
-def remove_transparency(img_path, dest=None):
+# Shrink by an integer factor with Image.reduce only down to this many
+# times the target size, leaving the rest to a proper resampling filter.
+REDUCING_GAP = 2
+
+# OCR this many pages ahead per worker, so workers never wait on the
+# page being written out while only a few finished pages sit in memory.
+PAGES_AHEAD_PER_JOB = 2
+
+
+def parse_size(text):
+    '''Parse a ``WxH`` size such as ``1920x1080`` into ``(W, H)``.'''
+    try:
+        width, height = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        width = height = 0
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(
+            'expected a size like 1920x1080, not {!r}'.format(text))
+    return width, height
+
+
+def open_rgb(img_path, max_size=None):
+    '''
+    Open ``img_path`` as an RGB image, scaled down to fit within
+    ``max_size`` (a ``(width, height)`` tuple) if it is larger.
+
+    JPEGs are decoded at a reduced scale through ``Image.draft``; other
+    formats are decoded in full, then shrunk by an integer factor with
+    ``Image.reduce`` before the final Lanczos resize. Both save time and
+    memory on large images compared with resizing the full decode.
+    '''
+    img = Image.open(img_path)
+    size = None
+    if max_size:
+        scale = min(max_size[0] / img.width, max_size[1] / img.height)
+        if scale < 1:
+            size = (max(1, round(img.width * scale)),
+                    max(1, round(img.height * scale)))
+            img.draft('RGB', size)
+    img = img.convert('RGB')
+    if size is None or img.size == size:
+        return img
+    factor = int(min(img.width / size[0], img.height / size[1]) / REDUCING_GAP)
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img.resize(size, Image.LANCZOS)
+
+
+def save_options(quality=None):
+    '''Keyword arguments for ``Image.save``; Pillow's defaults if unset.'''
+    return {} if quality is None else {'quality': quality}
+
+
+def remove_transparency(img_path, dest=None, max_size=None, quality=None):
     if not dest:
         dest = img_path
-    return Image.open(img_path).convert('RGB').save(dest)
+    return open_rgb(img_path, max_size).save(dest, **save_options(quality))
+
+
+def ocr_page(image):
+    '''
+    OCR the image file ``image`` into a one-page searchable PDF, and
+    return its bytes and the seconds taken.
+    '''
+    import pytesseract
+    start = time.perf_counter()
+    with Image.open(image) as img:
+        pdfdata = pytesseract.image_to_pdf_or_hocr(img)
+    return pdfdata, time.perf_counter() - start
 
 
-def convert_images_to_pdf(images, dest):
+def ocr_pages(images, jobs=1):
+    '''
+    Yield ``(image, pdfdata, seconds)`` from ``ocr_page`` for each of
+    ``images`` in order, OCRing up to ``jobs`` pages at a time. Each page
+    runs in its own tesseract process, so threads keep ``jobs`` cores
+    busy.
+    '''
+    images = collections.deque(images)
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    pending = collections.deque()
+    try:
+        while images or pending:
+            while images and len(pending) < jobs * PAGES_AHEAD_PER_JOB:
+                image = images.popleft()
+                pending.append((image, executor.submit(ocr_page, image)))
+            image, future = pending.popleft()
+            yield (image,) + future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def format_page_time(number, total, image, seconds):
+    return 'page {}/{} {}: {:.1f}s'.format(number, total, image, seconds)
+
+
+def format_ocr_summary(pages, elapsed, ocr_seconds):
+    '''
+    One line on how long OCR took overall and per page; with several
+    jobs, ``ocr_seconds`` (the sum over pages) exceeds ``elapsed``.
+    '''
+    return 'OCRed {} pages in {:.1f}s: {:.1f} pages/sec, {:.1f}s per page'.format(
+        pages,
+        elapsed,
+        pages / elapsed if elapsed else 0.0,
+        ocr_seconds / pages if pages else 0.0,
+    )
+
+
+def merge_pdfs(pdfs, dest):
+    '''
+    Merge ``pdfs``, an iterable of PDF documents as bytes, into one PDF
+    at ``dest`` (a filename or binary file object), entirely in memory.
+    Each document is added as it arrives and nothing is written until
+    the end.
+    '''
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for pdfdata in pdfs:
+        writer.append(io.BytesIO(pdfdata))
+    writer.write(dest)
+
+
+def convert_images_to_pdf(images, dest, jobs=1):
     '''
     Given an ordered list of filenames at ``images``, this function
-    converts them all into a single PDF file at destination ``dest``.
+    converts them all into a single PDF file at destination ``dest``,
+    OCRing up to ``jobs`` pages at a time. The time taken by each page
+    is reported on stderr.
 
     Prerequisites:
 
@@ -42,14 +164,7 @@ def convert_images_to_pdf(images, dest):
           -P /opt/local/share/tessdata/ \
           https://github.com/tesseract-ocr/tessdata/raw/master/eng.traineddata
 
-    - pip install pytesseract
-
-    - Install pdftk, e.g. "sudo port install pdftk"
-
-    - If you get `fatal error: string.h: No such file or directory`,
-      you may need to install C++ headers to get pdftk compiled. On
-      MacOS 10.14, for example:
-    $ open /Library/Developer/CommandLineTools/Packages/macOS_SDK_headers_for_macOS_10.14.pkg
+    - pip install pytesseract pypdf
     '''
     # Require tesseract
     tesseract_bin = shutil.which('tesseract')
@@ -61,29 +176,31 @@ def convert_images_to_pdf(images, dest):
     except ModuleNotFoundError:
         sys.exit('Error: pytesseract required to convert images to PDF')
     pytesseract.pytesseract.tesseract_cmd = tesseract_bin
-    # Require pdftk
-    pdftk_bin = shutil.which('pdftk')
-    if not pdftk_bin:
-        sys.exit('Error: pdftk required to convert images to PDF')
-    cwd = os.getcwd()
-    with tempfile.TemporaryDirectory() as tempdir:
-        pdfs_generated = []
-        for image in images:
-            pdfdest = image + '.pdf'
-            pdfdata = pytesseract.image_to_pdf_or_hocr(Image.open(image))
-            with open(os.path.join(tempdir, pdfdest), 'wb') as pdfout:
-                pdfout.write(pdfdata)
-            pdfs_generated.append(pdfdest)
-        os.chdir(tempdir)
-        if os.system('{} {} cat output {}'.format(pdftk_bin,
-                                                  ' '.join(pdfs_generated),
-                                                  '_tmpoutfile.pdf',
-                                                  )):
-            sys.exit('pdftk exited with error')
-        shutil.move(
-            os.path.join(tempdir, '_tmpoutfile.pdf'),
-            os.path.join(cwd, dest),
-        )
+    if jobs > 1:
+        # Pages are OCRed in parallel already; a multithreaded tesseract
+        # on top of that only oversubscribes the cores.
+        os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    # Require pypdf
+    try:
+        import pypdf  # noqa: F401
+    except ModuleNotFoundError:
+        sys.exit('Error: pypdf required to convert images to PDF')
+    start = time.perf_counter()
+    ocr_seconds = 0.0
+
+    def timed_pages():
+        nonlocal ocr_seconds
+        pages = ocr_pages(images, jobs)
+        for number, (image, pdfdata, seconds) in enumerate(pages, 1):
+            print(format_page_time(number, len(images), image, seconds),
+                  file=sys.stderr)
+            ocr_seconds += seconds
+            yield pdfdata
+
+    merge_pdfs(timed_pages(), dest)
+    print(format_ocr_summary(len(images), time.perf_counter() - start,
+                             ocr_seconds),
+          file=sys.stderr)
 
 
 def print_info(img_path):
@@ -105,9 +222,21 @@ def parse_args():
     parser.add_argument('--remove-transparency',
                         action='store_true',
                         help='remove transparency layer')
+    parser.add_argument('--max-size',
+                        type=parse_size,
+                        help='with --remove-transparency, shrink images to '
+                             'fit within WxH')
+    parser.add_argument('--quality',
+                        type=int,
+                        help='with --remove-transparency, JPEG quality (1-95)')
     parser.add_argument('--to-pdf',
                         action='store_true',
                         help='convert images to pdf')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=os.cpu_count() or 1,
+                        help='with --to-pdf, number of pages to OCR in '
+                             'parallel (default: number of CPUs)')
     return parser.parse_args()
 
 
@@ -115,11 +244,12 @@ def main():
     args = parse_args()
     if args.remove_transparency:
         for filename in args.filenames:
-            remove_transparency(filename, args.dest)
+            remove_transparency(filename, args.dest, args.max_size,
+                                args.quality)
     if args.to_pdf:
         if not args.dest:
             sys.exit('--dest option required to convert images to PDF')
-        convert_images_to_pdf(args.filenames, args.dest)
+        convert_images_to_pdf(args.filenames, args.dest, args.jobs)
     else:
         for filename in args.filenames:
             print_info(filename)
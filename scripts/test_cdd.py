@@ -0,0 +1,159 @@
+import importlib.machinery
+import importlib.util
+import os
+import pathlib
+import tempfile
+import unittest
+
+SCRIPT_PATH = pathlib.Path(__file__).with_name("cdd")
+LOADER = importlib.machinery.SourceFileLoader("cdd", str(SCRIPT_PATH))
+SPEC = importlib.util.spec_from_loader("cdd", LOADER)
+cdd = importlib.util.module_from_spec(SPEC)
+LOADER.exec_module(cdd)
+
+
+def make_tree(root, paths):
+    for rel in paths:
+        path = os.path.join(root, rel)
+        if rel.endswith("/"):
+            os.makedirs(path, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+
+class TestWalkDirsBfs(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        make_tree(
+            self.root,
+            ["a/b/c/", "a/file.txt", "z/", ".git/objects/", "web/node_modules/x/"],
+        )
+
+    def walk(self, **kwargs):
+        return [
+            (os.path.relpath(path, self.root), kind)
+            for path, kind in cdd.walk_dirs_bfs(self.root, **kwargs)
+        ]
+
+    def test_yields_directories_breadth_first(self):
+        result = self.walk(prune=())
+
+        depths = [path.count(os.sep) for path, _ in result if path != "."]
+        self.assertEqual(depths, sorted(depths))
+        self.assertEqual(
+            sorted(result),
+            sorted(
+                [
+                    (".", "d"),
+                    ("a", "d"),
+                    ("z", "d"),
+                    (".git", "d"),
+                    ("web", "d"),
+                    ("a/b", "d"),
+                    (".git/objects", "d"),
+                    ("web/node_modules", "d"),
+                    ("a/b/c", "d"),
+                    ("web/node_modules/x", "d"),
+                ]
+            ),
+        )
+
+    def test_prunes_without_hiding_pruned_directory(self):
+        result = self.walk()
+
+        self.assertIn(("web/node_modules", "d"), result)
+        self.assertIn((".git", "d"), result)
+        self.assertNotIn(("web/node_modules/x", "d"), result)
+        self.assertNotIn((".git/objects", "d"), result)
+
+    def test_lists_files_on_request(self):
+        self.assertNotIn(("a/file.txt", "f"), self.walk())
+        self.assertIn(("a/file.txt", "f"), self.walk(include_files=True))
+
+    def test_concurrent_walk_keeps_order(self):
+        make_tree(
+            self.root,
+            ["%d/%d/%s/" % (i, j, k) for i in range(5) for j in range(4) for k in "ab"],
+        )
+
+        for include_files in [False, True]:
+            self.assertEqual(
+                self.walk(include_files=include_files, jobs=4),
+                self.walk(include_files=include_files),
+            )
+
+    def test_concurrent_walk_stops_early(self):
+        walk = cdd.walk_dirs_bfs(self.root, jobs=4)
+
+        self.assertEqual(next(walk), (self.root, "d"))
+        walk.close()
+
+
+class TestBinaryIndex(unittest.TestCase):
+    TREE = [
+        "src/app/",
+        "src/App.py",
+        "docs/app/",
+        "docs/guide/setup.md",
+        "lib/mapp/",
+        "zz/deep/er/app/",
+    ]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "tree")
+        make_tree(self.root, self.TREE)
+        self.index_path = os.path.join(tmp.name, cdd.BINARY_INDEX_NAME)
+
+    def linear(self, suffix, include_files=False):
+        suffix = suffix.casefold()
+        return [
+            (path, kind)
+            for path, kind in cdd.walk_dirs_bfs(self.root, include_files=include_files)
+            if path.casefold().endswith(suffix)
+        ]
+
+    def test_search_matches_linear_scan_in_walk_order(self):
+        count = cdd.build_binary_index(self.root, self.index_path)
+        index = cdd.BinaryIndex(self.index_path)
+
+        walk = list(cdd.walk_dirs_bfs(self.root, include_files=True))
+        self.assertEqual(count, len(walk))
+        for suffix in ["app", "APP", "pp", ".py", "setup.md", "nomatch", ""]:
+            for include_files in [False, True]:
+                self.assertEqual(
+                    list(index.search(suffix, include_files)),
+                    self.linear(suffix, include_files),
+                )
+
+    def test_finds_files_only_when_asked(self):
+        cdd.build_binary_index(self.root, self.index_path)
+        index = cdd.BinaryIndex(self.index_path)
+        setup = os.path.join(self.root, "docs", "guide", "setup.md")
+
+        self.assertEqual(list(index.search("setup.md")), [])
+        self.assertEqual(list(index.search("setup.md", True)), [(setup, "f")])
+
+    def test_search_skips_entries_gone_since_indexing(self):
+        cdd.build_binary_index(self.root, self.index_path)
+        os.rmdir(os.path.join(self.root, "src", "app"))
+
+        result = list(cdd.BinaryIndex(self.index_path).search("app"))
+
+        self.assertNotIn((os.path.join(self.root, "src", "app"), "d"), result)
+        self.assertIn((os.path.join(self.root, "docs", "app"), "d"), result)
+
+    def test_rejects_other_files(self):
+        with open(self.index_path, "wb") as f:
+            f.write(b"not an index at all")
+
+        with self.assertRaises(ValueError):
+            cdd.BinaryIndex(self.index_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,15 @@
+import io
+import os
+import tempfile
 import unittest
 
-from count_words import count_separators
+from count_words import (
+    BACKENDS,
+    count_files_parallel,
+    count_separators,
+    count_separators_stream,
+    split_points,
+)
 
 
 class TestCountSeparators(unittest.TestCase):
@@ -31,5 +40,94 @@ class TestCountSeparators(unittest.TestCase):
         self.assertEqual(count_separators("a b\nc"), 2)
 
 
+class TestCountSeparatorsStream(unittest.TestCase):
+    CASES = [
+        "one two three",
+        "one\ntwo",
+        "one   two",
+        "one—two",
+        "one–two",
+        "",
+        "word",
+        "a b\nc",
+    ]
+
+    def test_matches_count_separators_for_every_chunk_size(self):
+        for text in self.CASES:
+            for chunk_size in (1, 2, 3, 1024):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    stream = io.StringIO(text)
+                    self.assertEqual(
+                        count_separators_stream(stream, chunk_size),
+                        count_separators(text),
+                    )
+
+    def test_separator_run_split_across_chunks_counts_once(self):
+        # The run of spaces straddles the 4-character chunk boundary
+        stream = io.StringIO("one  \u2014 two")
+        self.assertEqual(count_separators_stream(stream, chunk_size=4), 1)
+
+
+class TestBackends(unittest.TestCase):
+    CASES = TestCountSeparatorsStream.CASES + [
+        " leading and trailing ",
+        "—dash–first and last—",
+        "mixed \n—– run" * 100,
+        "non-ascii é\u00a0é",
+    ]
+
+    def test_every_backend_matches_loop(self):
+        for text in self.CASES:
+            expected = count_separators(text, backend="loop")
+            for backend in BACKENDS:
+                with self.subTest(text=text[:20], backend=backend):
+                    self.assertEqual(count_separators(text, backend), expected)
+
+    def test_streamed_backends_carry_state_across_chunks(self):
+        text = "one  \u2014 two—— three"
+        for backend in BACKENDS:
+            for chunk_size in (1, 2, 5):
+                with self.subTest(backend=backend, chunk_size=chunk_size):
+                    stream = io.StringIO(text)
+                    self.assertEqual(
+                        count_separators_stream(stream, chunk_size, backend), 2
+                    )
+
+
+class TestCountFilesParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+    def test_split_points_fall_after_separators(self):
+        path = self._write("big.txt", "word—word  word\r\nword " * 20)
+        with open(path, "rb") as f:
+            data = f.read()
+        points = split_points(path, piece_size=10)
+        self.assertEqual(points[0], 0)
+        self.assertGreater(len(points), 1)
+        for point in points[1:]:
+            self.assertIn(data[point - 1 : point], (b" ", b"\n"))
+
+    def test_matches_sequential_counts_in_argument_order(self):
+        texts = {
+            "a.txt": "one two three",
+            "b.txt": "",
+            "c.txt": "long—text  with\r\nruns " * 50,
+        }
+        paths = [self._write(name, text) for name, text in texts.items()]
+        expected = [
+            (path, count_separators(text)) for path, text in zip(paths, texts.values())
+        ]
+        result = list(count_files_parallel(paths, jobs=2, piece_size=16))
+        self.assertEqual(result, expected)
+
+
 if __name__ == "__main__":
     unittest.main()
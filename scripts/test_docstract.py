@@ -1,13 +1,31 @@
+import os
+import tempfile
 import unittest
+import unittest.mock
 
 from count_words import count_separators
 from docstract import (
+    MappedLines,
+    build_index,
+    cache_get,
+    cache_put,
+    cached,
+    decode_markdown,
     extract_section,
     format_word_count,
+    format_word_count_delta,
     get_footnotes,
     get_section,
+    map_file,
+    read_abstract,
+    read_outline,
+    read_section,
+    section_from_index,
+    tokenize,
     word_count_from_chapter_one,
+    word_count_from_index,
     word_count_segmented,
+    write_sections,
 )
 
 # Note: count_separators tests live in test_count_words.py
@@ -313,5 +331,260 @@ class TestWordCountSegmented(unittest.TestCase):
         self.assertGreater(by_number["2"], count_without_footnote)
 
 
+class TestTokenize(unittest.TestCase):
+    def _kinds(self, text):
+        return [(t.kind, t.number) for t in tokenize(text.splitlines(keepends=True))]
+
+    def test_labels_headings_and_subheadings(self):
+        self.assertEqual(
+            self._kinds("### 2\\. Animals\n#### 2.1 Mammals\nText.\n"),
+            [("heading", "2"), ("subheading", "2.1"), ("text", None)],
+        )
+
+    def test_labels_footnote_definitions(self):
+        self.assertEqual(
+            self._kinds("[^1]: First.\n  [^2]: Indented.\n[^3]:\n"),
+            [
+                ("footnote_def", "1"),
+                ("footnote_mark", "2"),
+                ("footnote_mark", "3"),
+            ],
+        )
+
+    def test_labels_abstract_markers(self):
+        self.assertEqual(
+            self._kinds("**ABSTRACT**\nWords: 12\n"),
+            [("abstract", None), ("words", None)],
+        )
+
+    def test_flags_images_thesis_and_references(self):
+        token, image = tokenize(
+            ["Thesis statement[^4] and[^5].\n", "<data:image/png;base64,abc>\n"]
+        )
+        self.assertTrue(token.is_thesis)
+        self.assertEqual(token.refs, [4, 5])
+        self.assertTrue(image.is_image)
+
+    def test_heading_needs_text_after_escaped_dot(self):
+        # "# 1\\" only becomes a heading with something after the backslash
+        self.assertEqual(self._kinds("# 1\\ \n"), [("text", None)])
+
+
+class TestBuildIndex(unittest.TestCase):
+    def test_sections_listed_with_subsections_in_order(self):
+        index = build_index(DOC_WITH_NESTED_SUBSECTIONS.splitlines(keepends=True))
+        self.assertEqual(index.sections, [("1", ["1.1", "1.2"]), ("2", [])])
+
+    def test_section_matches_get_section(self):
+        lines = DOC_WITH_SUBSECTIONS.splitlines(keepends=True)
+        index = build_index(lines)
+        for number in ["2", "2.1", "2.2", "3", "99"]:
+            self.assertEqual(index.section(number), get_section(lines, number))
+
+    def test_section_footnotes_match_get_footnotes(self):
+        lines = DOC_WITH_FOOTNOTE_REFS.splitlines(keepends=True)
+        index = build_index(lines)
+        for number in ["1", "2"]:
+            section = get_section(lines, number)
+            self.assertEqual(
+                index.section_footnotes(number), get_footnotes(section, lines)
+            )
+
+    def test_image_lines_are_dropped(self):
+        index = build_index(DOC_WITH_IMAGE.splitlines(keepends=True))
+        self.assertFalse(any("<data:image" in line for line in index.lines))
+
+
+class TestSingleResultReads(unittest.TestCase):
+    DOCS = [
+        SIMPLE_DOC,
+        DOC_WITH_FOOTNOTE_REFS,
+        DOC_WITH_IMAGE,
+        DOC_WITH_SUBSECTIONS,
+        DOC_WITH_PREAMBLE,
+        DOC_WITH_NESTED_SUBSECTIONS,
+    ]
+
+    def test_match_the_full_index(self):
+        for doc in self.DOCS:
+            lines = doc.splitlines(keepends=True)
+            index = build_index(lines)
+            self.assertEqual(read_outline(lines), "".join(index.outline))
+            self.assertEqual(read_abstract(lines), index.abstract)
+            for number in ["1", "1.1", "1.2", "2", "2.1", "2.2", "3", "99"]:
+                self.assertEqual(
+                    read_section(lines, number),
+                    (index.section(number), index.section_footnotes(number)),
+                )
+
+    def test_repeated_heading_restarts_section(self):
+        lines = ["# 1\\. A\n", "a\n", "# 1\\. A\n", "b [^1]\n", "[^1]: One.\n"]
+        self.assertEqual(read_section(lines, "1"), (lines[2:4], ["[^1]: One."]))
+
+    def test_abstract_stops_at_words_line(self):
+        lines = iter(["Title\n", "**ABSTRACT**\n", "Text.\n", "Words: 1\n", "rest\n"])
+        self.assertEqual(read_abstract(lines), "**ABSTRACT**\nText.\nWords: 1\n")
+        self.assertEqual(next(lines), "rest\n")
+
+
+class TestMappedLines(unittest.TestCase):
+    def _expected(self, data):
+        lines = decode_markdown(data).splitlines(keepends=True)
+        return [line for line in lines if "<data:image" not in line]
+
+    def test_matches_splitlines_without_image_lines(self):
+        data = DOC_WITH_IMAGE.encode()
+        self.assertEqual(list(MappedLines(data)), self._expected(data))
+
+    def test_handles_crlf_and_other_line_breaks(self):
+        data = "a\r\nb\rc\x0cd\u2028é\x85<data:image/png;base64,x>\nlast".encode()
+        lines = MappedLines(data)
+        self.assertEqual(list(lines), self._expected(data))
+        self.assertEqual(lines[1:3], ["b\n", "c\x0c"])
+
+    def test_keeps_lines_after_an_image_on_the_same_segment(self):
+        data = (
+            "# 1\\. A\rtext one\r[image1]: <data:image/png;base64,xx>\r"
+            "# 2\\. B\x0c<data:image/png;base64,yy>\x0cmore words\r"
+            "x<data:image/png;base64,zz>\u2028tail\n"
+        ).encode()
+        lines = MappedLines(data)
+        self.assertEqual(list(lines), self._expected(data))
+        self.assertIn("more words\n", list(lines))
+        self.assertIn("tail\n", list(lines))
+
+    def test_unclosed_image_marker_still_ends_at_a_line_break(self):
+        data = "a\rb<data:image/png;base64,xx\x0cafter\nlast".encode()
+        self.assertEqual(list(MappedLines(data)), ["a\n", "after\n", "last"])
+
+    def test_index_matches_in_memory_index(self):
+        data = DOC_WITH_SUBSECTIONS.encode()
+        mapped = build_index(MappedLines(data))
+        in_memory = build_index(DOC_WITH_SUBSECTIONS.splitlines(keepends=True))
+        for number in ["2", "2.1", "2.2", "3"]:
+            self.assertEqual(
+                section_from_index(mapped, number),
+                section_from_index(in_memory, number),
+            )
+
+    def test_maps_files_including_empty_ones(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "doc.md")
+            for text in ["", SIMPLE_DOC]:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                lines = MappedLines(map_file(path))
+                self.assertEqual(list(lines), text.splitlines(keepends=True))
+
+
+class TestWriteSections(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_writes_each_section_as_extract_section_prints_it(self):
+        index = build_index(DOC_WITH_SUBSECTIONS.splitlines(keepends=True))
+        paths = write_sections(index, ["2.1", "3"], self.tmpdir.name)
+        self.assertEqual(
+            [os.path.basename(p) for p in paths], ["section-2.1.md", "section-3.md"]
+        )
+        for number, path in zip(["2.1", "3"], paths):
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), section_from_index(index, number) + "\n")
+
+    def test_skips_missing_sections(self):
+        index = build_index(SIMPLE_DOC.splitlines(keepends=True))
+        with unittest.mock.patch("sys.stderr"):
+            paths = write_sections(index, ["99", "1"], self.tmpdir.name)
+        self.assertEqual([os.path.basename(p) for p in paths], ["section-1.md"])
+
+
+class TestIncrementalWordCount(unittest.TestCase):
+    def _index(self, text):
+        return build_index(text.splitlines(keepends=True))
+
+    def test_memo_matches_plain_count(self):
+        memo = {}
+        index = self._index(DOC_WITH_NESTED_SUBSECTIONS)
+        self.assertEqual(
+            word_count_from_index(index, memo),
+            word_count_segmented(DOC_WITH_NESTED_SUBSECTIONS),
+        )
+        self.assertEqual(len(memo), 3)  # 1.1, 1.2 and 2
+
+    def test_unchanged_sections_are_not_recounted(self):
+        memo = {}
+        word_count_from_index(self._index(DOC_WITH_NESTED_SUBSECTIONS), memo)
+        edited = DOC_WITH_NESTED_SUBSECTIONS.replace("Sun is", "The Sun is")
+        seen = dict(memo)
+        word_count_from_index(self._index(edited), memo)
+        new_texts = [text for text in memo if text not in seen]
+        self.assertEqual(len(new_texts), 1)
+        self.assertIn("The Sun is", new_texts[0])
+
+    def test_delta_lists_only_changed_sections(self):
+        old = word_count_segmented(DOC_WITH_NESTED_SUBSECTIONS)
+        new = word_count_segmented(
+            DOC_WITH_NESTED_SUBSECTIONS.replace("Sun is", "The Sun is")
+        )
+        self.assertEqual(
+            format_word_count_delta(old, new).splitlines(),
+            [f"2. {new.sections['2'].count} (+1)", f"Total: {new.total} (+1)"],
+        )
+
+    def test_delta_reports_removed_sections(self):
+        old = word_count_segmented(SIMPLE_DOC)
+        new = word_count_segmented(SIMPLE_DOC.replace("# 3\\. Results", "Results"))
+        self.assertIn("3. removed", format_word_count_delta(old, new))
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache_dir = self.tmpdir.name
+
+    def test_round_trips_word_count_result(self):
+        result = word_count_segmented(DOC_WITH_NESTED_SUBSECTIONS)
+        cache_put(self.cache_dir, "key", result)
+        self.assertEqual(cache_get(self.cache_dir, "key"), result)
+
+    def test_miss_returns_none(self):
+        self.assertIsNone(cache_get(self.cache_dir, "missing"))
+
+    def test_cached_computes_once_per_input_and_mode(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "outline"
+
+        data = SIMPLE_DOC.encode()
+        for _ in range(3):
+            result = cached(data, "outline", compute, self.cache_dir)
+            self.assertEqual(result, "outline")
+        cached(data, "count", compute, self.cache_dir)
+        cached(b"other", "outline", compute, self.cache_dir)
+        self.assertEqual(len(calls), 3)
+
+    def test_cached_without_cache_dir_always_computes(self):
+        calls = []
+        for _ in range(2):
+            cached(b"data", "outline", lambda: calls.append(1) or "x", None)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_evicts_least_recently_used_entries(self):
+        cache_put(self.cache_dir, "old", "x" * 1000)
+        cache_put(self.cache_dir, "used", "y" * 1000)
+        os.utime(os.path.join(self.cache_dir, "old.pickle"), (0, 0))
+        os.utime(os.path.join(self.cache_dir, "used.pickle"), (1, 1))
+        cache_get(self.cache_dir, "used")
+        cache_put(self.cache_dir, "new", "z" * 1000, max_bytes=2500)
+        self.assertIsNone(cache_get(self.cache_dir, "old"))
+        self.assertEqual(cache_get(self.cache_dir, "used"), "y" * 1000)
+        self.assertEqual(cache_get(self.cache_dir, "new"), "z" * 1000)
+
+
 if __name__ == "__main__":
     unittest.main()
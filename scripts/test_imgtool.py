@@ -0,0 +1,116 @@
+import argparse
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+try:
+    from PIL import Image
+except ModuleNotFoundError:
+    Image = imgtool = None
+else:
+    import imgtool
+
+try:
+    import pypdf
+except ModuleNotFoundError:
+    pypdf = None
+
+
+@unittest.skipIf(Image is None, "Pillow not installed")
+class TestOpenRgb(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def make(self, name, size, mode="RGBA"):
+        path = os.path.join(self.dir, name)
+        Image.new(mode, size, (200, 100, 50, 128)[: len(mode)]).save(path)
+        return path
+
+    def test_parse_size(self):
+        self.assertEqual(imgtool.parse_size("1920x1080"), (1920, 1080))
+        for bad in ["1920", "0x10", "axb", "1x2x3"]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                imgtool.parse_size(bad)
+
+    def test_fits_within_max_size_keeping_aspect(self):
+        for name in ["big.png", "big.jpg", "big.webp"]:
+            mode = "RGB" if name.endswith(".jpg") else "RGBA"
+            path = self.make(name, (4000, 1000), mode)
+
+            img = imgtool.open_rgb(path, (800, 800))
+
+            self.assertEqual((img.mode, img.size), ("RGB", (800, 200)), name)
+
+    def test_never_enlarges(self):
+        path = self.make("small.png", (40, 30))
+
+        self.assertEqual(imgtool.open_rgb(path, (800, 600)).size, (40, 30))
+        self.assertEqual(imgtool.open_rgb(path).size, (40, 30))
+
+    def test_remove_transparency_with_quality(self):
+        path = self.make("in.png", (300, 200))
+        dest = os.path.join(self.dir, "out.jpg")
+
+        imgtool.remove_transparency(path, dest, max_size=(150, 150), quality=40)
+
+        with Image.open(dest) as img:
+            self.assertEqual((img.mode, img.size), ("RGB", (150, 100)))
+
+
+@unittest.skipIf(Image is None, "Pillow not installed")
+class TestOcrPages(unittest.TestCase):
+    def test_keeps_page_order_and_bounds_workers(self):
+        lock = threading.Lock()
+        running = [0, 0]  # now, most at once
+
+        def fake_ocr_page(image):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.02 if image % 3 == 0 else 0.001)
+            with lock:
+                running[0] -= 1
+            return b"pdf%d" % image, 0.5
+
+        with mock.patch.object(imgtool, "ocr_page", fake_ocr_page):
+            pages = list(imgtool.ocr_pages(range(20), jobs=3))
+
+        self.assertEqual(pages, [(i, b"pdf%d" % i, 0.5) for i in range(20)])
+        self.assertLessEqual(running[1], 3)
+
+    def test_reports(self):
+        self.assertEqual(
+            imgtool.format_page_time(3, 300, "scan003.png", 2.414),
+            "page 3/300 scan003.png: 2.4s",
+        )
+        self.assertEqual(
+            imgtool.format_ocr_summary(300, 150.0, 600.0),
+            "OCRed 300 pages in 150.0s: 2.0 pages/sec, 2.0s per page",
+        )
+
+
+@unittest.skipIf(Image is None or pypdf is None, "Pillow or pypdf not installed")
+class TestMergePdfs(unittest.TestCase):
+    def test_merges_pages_in_order(self):
+        pdfs = []
+        for width in [100, 200, 300]:
+            page = io.BytesIO()
+            Image.new("RGB", (width, 50)).save(page, "PDF")
+            pdfs.append(page.getvalue())
+        out = io.BytesIO()
+
+        imgtool.merge_pdfs(iter(pdfs), out)
+
+        reader = pypdf.PdfReader(io.BytesIO(out.getvalue()))
+        widths = [round(float(page.mediabox.width)) for page in reader.pages]
+        self.assertEqual(widths, [100, 200, 300])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import collections
+import importlib.machinery
+import importlib.util
+import io
+import pathlib
+import random
+import tempfile
+import time
+import unittest
+
+SCRIPT_PATH = pathlib.Path(__file__).with_name("random")
+LOADER = importlib.machinery.SourceFileLoader("random_lines", str(SCRIPT_PATH))
+SPEC = importlib.util.spec_from_loader("random_lines", LOADER)
+random_lines = importlib.util.module_from_spec(SPEC)
+LOADER.exec_module(random_lines)
+
+
+class TestReservoirSample(unittest.TestCase):
+    def test_sample_is_uniform(self):
+        rng = random.Random(0)
+        lines = [b"%d\n" % i for i in range(10)]
+        counts = collections.Counter()
+        trials = 20000
+        for _ in range(trials):
+            counts.update(random_lines.reservoir_sample(lines, 3, rng))
+
+        expected = trials * 3 / len(lines)
+        for line in lines:
+            self.assertAlmostEqual(counts[line] / expected, 1, delta=0.05)
+
+    def test_short_input_is_returned_whole(self):
+        lines = [b"a\n", b"b\n"]
+
+        sample = random_lines.reservoir_sample(lines, 5, random.Random(0))
+
+        self.assertEqual(sorted(sample), lines)
+
+    def test_seed_repeats_sample(self):
+        lines = [b"%d\n" % i for i in range(1000)]
+
+        first = random_lines.reservoir_sample(lines, 5, random.Random("seed"))
+        second = random_lines.reservoir_sample(lines, 5, random.Random("seed"))
+
+        self.assertEqual(first, second)
+
+    def test_choose_keeps_single_line_interface(self):
+        self.assertIn(random_lines.choose(io.StringIO("a\nb\n")), ["a\n", "b\n"])
+        self.assertEqual(random_lines.choose(io.StringIO("")), "")
+
+    def test_format_sample_terminates_all_but_last_line(self):
+        self.assertEqual(random_lines.format_sample([b"a", b"b\n", b"c"]), b"a\nb\nc")
+        self.assertEqual(random_lines.format_sample([]), b"")
+
+
+class TestSampleMapped(unittest.TestCase):
+    def test_long_lines_are_not_favoured(self):
+        rng = random.Random(0)
+        lines = [b"a\n", b"b" * 50 + b"\n", b"c\n", b"d" * 20]
+        data = b"".join(lines)
+        counts = collections.Counter()
+        trials = 8000
+        for _ in range(trials):
+            counts.update(random_lines.sample_mapped(data, 0, 1, rng))
+
+        for line in lines:
+            self.assertAlmostEqual(counts[line] / (trials / 4), 1, delta=0.1)
+
+    def test_starts_at_given_offset(self):
+        data = b"skipped\nkept\n"
+
+        sample = random_lines.sample_mapped(data, 8, 1, random.Random(0))
+
+        self.assertEqual(sample, [b"kept\n"])
+
+    def test_gives_up_when_lines_run_out(self):
+        data = b"only line\n"
+
+        self.assertIsNone(random_lines.sample_mapped(data, 0, 2, random.Random(0)))
+
+    def test_sample_file_falls_back_to_scanning(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b"one\ntwo\n")
+            f.seek(0)
+
+            sample = random_lines.sample_file(f.fileno(), 5, random.Random(0))
+
+        self.assertEqual(sorted(sample), [b"one\n", b"two\n"])
+
+    def test_gives_up_quickly_when_k_exceeds_lines(self):
+        lines = [b"%d\n" % i for i in range(10)]
+        with tempfile.TemporaryFile() as f:
+            f.write(b"".join(lines))
+            f.seek(0)
+            start = time.perf_counter()
+
+            sample = random_lines.sample_file(f.fileno(), 10000, random.Random(0))
+
+            elapsed = time.perf_counter() - start
+        self.assertEqual(sorted(sample), sorted(lines))
+        self.assertLess(elapsed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
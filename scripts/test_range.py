@@ -0,0 +1,53 @@
+import importlib.machinery
+import importlib.util
+import io
+import pathlib
+import unittest
+
+SCRIPT_PATH = pathlib.Path(__file__).with_name("range")
+LOADER = importlib.machinery.SourceFileLoader("range_script", str(SCRIPT_PATH))
+SPEC = importlib.util.spec_from_loader("range_script", LOADER)
+range_script = importlib.util.module_from_spec(SPEC)
+LOADER.exec_module(range_script)
+
+
+def expected(numbers, sep="\n", fmt=None):
+    if not numbers:
+        return b""
+    format_number = str if fmt is None else fmt.__mod__
+    return (sep.join(map(format_number, numbers)) + "\n").encode()
+
+
+class TestWriteRange(unittest.TestCase):
+    CASES = [
+        range(1, 6),
+        range(5, 1),
+        range(0, 1),
+        range(10, -11, -3),
+        range(0, 1_000_000, 7),
+        # Crossing zero and several template spans, starting unaligned
+        range(-100_005, 300_004),
+        range(10**12 - 7, 10**12 + 250_001),
+    ]
+
+    def check(self, numbers, sep="\n", fmt=None):
+        out = io.BytesIO()
+        range_script.write_range(out, numbers, sep, fmt)
+        self.assertEqual(out.getvalue(), expected(numbers, sep, fmt), numbers)
+
+    def test_matches_one_number_at_a_time(self):
+        for numbers in self.CASES:
+            self.check(numbers)
+
+    def test_separator_goes_between_numbers(self):
+        for numbers in self.CASES:
+            self.check(numbers, sep=", ")
+        self.check(range(1, 4), sep=",")
+
+    def test_format_applies_to_every_number(self):
+        for numbers in self.CASES:
+            self.check(numbers, fmt="%07d")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import importlib.machinery
+import importlib.util
+import io
+import pathlib
+import unittest
+
+SCRIPT_PATH = pathlib.Path(__file__).with_name("trim")
+LOADER = importlib.machinery.SourceFileLoader("trim", str(SCRIPT_PATH))
+SPEC = importlib.util.spec_from_loader("trim", LOADER)
+trim = importlib.util.module_from_spec(SPEC)
+LOADER.exec_module(trim)
+
+
+def run(data, chunk_size=trim.CHUNK_SIZE, **kwargs):
+    out = io.BytesIO()
+    old_chunk_size = trim.CHUNK_SIZE
+    trim.CHUNK_SIZE = chunk_size
+    try:
+        trim.trim_stream(io.BytesIO(data), out, **kwargs)
+    finally:
+        trim.CHUNK_SIZE = old_chunk_size
+    return out.getvalue()
+
+
+class TestTrimStream(unittest.TestCase):
+    def test_matches_str_strip_per_line(self):
+        text = "  a b \t\n\r\n\x1c x\x1f\n\xa0déjà vu \nlast  "
+        expected = "".join(line.strip() + "\n" for line in text.split("\n"))
+
+        for chunk_size in [1, 3, 1024]:
+            self.assertEqual(run(text.encode(), chunk_size), expected.encode())
+
+    def test_left_and_right_only(self):
+        data = b"  a  \n\t b\t\n"
+
+        self.assertEqual(run(data, left=True, right=False), b"a  \nb\t\n")
+        self.assertEqual(run(data, left=False, right=True), b"  a\n\t b\n")
+
+    def test_squeeze_blank_across_chunks(self):
+        data = b"\n \n\na\n\n  \n\t\nb\n\n\n"
+
+        for chunk_size in [1, 2, 1024]:
+            self.assertEqual(run(data, chunk_size, squeeze=True), b"\na\n\nb\n\n")
+
+    def test_empty_input(self):
+        self.assertEqual(run(b""), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
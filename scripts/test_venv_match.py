@@ -1,8 +1,19 @@
+import shutil
 import tempfile
+import threading
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from venv_match import find_matches
+import venv_match
+from venv_match import (
+    DEFAULT_PRUNE,
+    find_matches,
+    first_match,
+    indexed_matches,
+    iter_matches,
+    trigrams,
+)
 
 
 class VenvMatchTests(unittest.TestCase):
@@ -26,3 +37,199 @@ class VenvMatchTests(unittest.TestCase):
             result = find_matches(root, "nomatch")
 
             self.assertEqual(result, [])
+
+    def test_index_matches_live_walk(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            for rel in ["alpha", "team/alpha/project", "team/beta", "gamma/sub"]:
+                (root / rel / ".git").mkdir(parents=True)
+            (root / "team" / "beta" / "nested").mkdir()
+            (root / "team" / "beta" / "nested" / ".git").write_text("gitdir: x")
+            index_path = Path(td) / "index.sqlite3"
+
+            for query in ["", "alpha", "beta", "nomatch"]:
+                self.assertEqual(
+                    indexed_matches(root, query, index_path),
+                    find_matches(root, query),
+                )
+
+    def test_index_picks_up_new_and_removed_repos(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            (root / "team" / "alpha" / ".git").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+            self.assertEqual(
+                indexed_matches(root, "", index_path), [str(root / "team" / "alpha")]
+            )
+
+            (root / "team" / "deep" / "beta" / ".git").mkdir(parents=True)
+            self.assertEqual(
+                indexed_matches(root, "beta", index_path),
+                [str(root / "team" / "deep" / "beta")],
+            )
+
+            shutil.rmtree(root / "team" / "alpha")
+            self.assertEqual(indexed_matches(root, "alpha", index_path), [])
+
+    def test_index_sees_deep_new_repo_alongside_other_matches(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            (root / "alpha" / ".git").mkdir(parents=True)
+            (root / "team" / "backend" / "services").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+            self.assertEqual(
+                indexed_matches(root, "alpha", index_path), [str(root / "alpha")]
+            )
+
+            deep = root / "team" / "backend" / "services" / "alpha-api"
+            (deep / ".git").mkdir(parents=True)
+
+            self.assertEqual(
+                indexed_matches(root, "alpha", index_path),
+                [str(root / "alpha"), str(deep)],
+            )
+
+    def test_rebuild_starts_from_scratch(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            (root / "alpha" / ".git").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+            indexed_matches(root, "", index_path)
+
+            result = indexed_matches(root, "alpha", index_path, rebuild=True)
+
+            self.assertEqual(result, [str(root / "alpha")])
+
+    def test_rebuild_walks_subtrees_on_worker_threads(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            for rel in ["alpha", "team/beta", "gamma/sub/delta"]:
+                (root / rel / ".git").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+            threads = set()
+            list_dir = venv_match._list_dir
+
+            def recording_list_dir(*args):
+                threads.add(threading.current_thread())
+                return list_dir(*args)
+
+            with mock.patch.object(venv_match, "_list_dir", recording_list_dir):
+                result = indexed_matches(root, "", index_path, rebuild=True)
+
+            self.assertEqual(result, find_matches(root, ""))
+            self.assertIn(threading.main_thread(), threads)
+            self.assertGreater(len(threads), 1)
+
+    def test_stops_at_repo_roots_unless_nested(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            outer = root / "outer"
+            inner = outer / "vendor" / "inner"
+            (outer / ".git").mkdir(parents=True)
+            (inner / ".git").mkdir(parents=True)
+
+            self.assertEqual(find_matches(root, ""), [str(outer)])
+            self.assertEqual(
+                find_matches(root, "", nested=True), [str(outer), str(inner)]
+            )
+            index_path = root / "index.sqlite3"
+            for nested in [False, True]:
+                self.assertEqual(
+                    indexed_matches(root, "", index_path, nested=nested),
+                    find_matches(root, "", nested=nested),
+                )
+
+    def test_skips_pruned_directories(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            (root / "app" / "node_modules" / "dep" / ".git").mkdir(parents=True)
+            (root / "build" / "tool" / ".git").mkdir(parents=True)
+            (root / "app" / "src" / "lib" / ".git").mkdir(parents=True)
+
+            lib = root / "app" / "src" / "lib"
+            self.assertEqual(find_matches(root, ""), [str(lib)])
+            self.assertEqual(
+                find_matches(root, "", prune=DEFAULT_PRUNE - {"build"}, jobs=1),
+                [str(root / "build" / "tool"), str(lib)],
+            )
+
+    def test_streaming_matches_live_walk(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            for rel in ["b/alpha", "a/x/alpha", "alpha", "a/beta", "c/d/e/alpha"]:
+                (root / rel / ".git").mkdir(parents=True)
+
+            for query in ["", "alpha", "beta", "nomatch"]:
+                self.assertEqual(
+                    list(iter_matches(root, query)), find_matches(root, query)
+                )
+
+    def test_first_match_stops_at_shallowest_level(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            (root / "zeta" / "alpha" / ".git").mkdir(parents=True)
+            (root / "deep" / "er" / "still" / "alpha" / ".git").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+
+            with mock.patch.object(
+                venv_match, "_list_dir", wraps=venv_match._list_dir
+            ) as list_dir:
+                result = first_match(root, "alpha", index_path)
+
+            self.assertEqual(result, str(root / "zeta" / "alpha"))
+            listed = {call.args[0] for call in list_dir.call_args_list}
+            self.assertNotIn(str(root / "deep" / "er" / "still"), listed)
+
+    def test_trigrams_pad_each_word(self) -> None:
+        self.assertEqual(trigrams("Go/ab"), {"  g", " go", "go ", "  a", " ab", "ab "})
+
+    def test_fuzzy_ranks_by_trigram_similarity(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            for rel in ["dotfiles", "old/dotfiles", "dotfile-tools", "web"]:
+                (root / rel / ".git").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+
+            result = indexed_matches(root, "dotfils", index_path, fuzzy=True)
+
+            self.assertEqual(
+                result,
+                [
+                    str(root / "dotfiles"),
+                    str(root / "dotfile-tools"),
+                    str(root / "old" / "dotfiles"),
+                ],
+            )
+
+    def test_fuzzy_forgets_removed_repos(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            (root / "team" / "alpha" / ".git").mkdir(parents=True)
+            (root / "team" / "alpine" / ".git").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+            indexed_matches(root, "", index_path)
+
+            shutil.rmtree(root / "team" / "alpha")
+
+            self.assertEqual(
+                indexed_matches(root, "alpha", index_path, fuzzy=True),
+                [str(root / "team" / "alpine")],
+            )
+
+    def test_fuzzy_breaks_ties_by_depth(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td) / "coding"
+            for rel in ["zz/tool", "tool/zz", "tool-zz", "other"]:
+                (root / rel / ".git").mkdir(parents=True)
+            index_path = Path(td) / "index.sqlite3"
+
+            result = indexed_matches(root, "tool zz", index_path, fuzzy=True)
+
+            self.assertEqual(
+                result,
+                [
+                    str(root / "tool-zz"),
+                    str(root / "tool" / "zz"),
+                    str(root / "zz" / "tool"),
+                ],
+            )
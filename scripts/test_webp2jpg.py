@@ -0,0 +1,139 @@
+import argparse
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+try:
+    from PIL import Image
+
+    import webp2jpg
+except ModuleNotFoundError:
+    Image = None
+
+
+@unittest.skipIf(Image is None, "Pillow not installed")
+class TestConvertAll(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.files = []
+        for i in range(4):
+            path = os.path.join(self.dir, "img%d.webp" % i)
+            Image.new("RGBA", (32, 16), (i * 60, 0, 0, 128)).save(path)
+            self.files.append(path)
+
+    def test_converts_in_order_with_workers(self):
+        results = list(webp2jpg.convert_all(self.files, jobs=2))
+
+        self.assertEqual([filename for filename, _, _ in results], self.files)
+        for filename, result, error in results:
+            self.assertIsNone(error)
+            jpgname, bytes_in, bytes_out = result
+            self.assertEqual(jpgname, filename[: -len(".webp")] + ".jpg")
+            self.assertEqual(bytes_in, os.path.getsize(filename))
+            self.assertEqual(bytes_out, os.path.getsize(jpgname))
+            with Image.open(jpgname) as img:
+                self.assertEqual(img.mode, "RGB")
+
+    def test_failures_do_not_stop_the_batch(self):
+        bad = os.path.join(self.dir, "bad.webp")
+        with open(bad, "w") as f:
+            f.write("not an image")
+        open(os.path.join(self.dir, "img1.jpg"), "w").close()
+
+        results = list(webp2jpg.convert_all([bad] + self.files))
+
+        errors = [error for _, _, error in results]
+        self.assertTrue(errors[0].startswith("UnidentifiedImageError"))
+        self.assertTrue(errors[2].startswith("AlreadyExists"))
+        self.assertEqual([e is None for e in errors], [False, True, False, True, True])
+
+    def test_summary_line(self):
+        self.assertEqual(
+            webp2jpg.format_summary(10, 1, 2.0, 3_000_000, 1_500_000),
+            "Converted 10 images (1 failed) in 2.0s: 5.0 images/sec, "
+            "3.0 MB in, 1.5 MB out",
+        )
+
+
+@unittest.skipIf(Image is None, "Pillow not installed")
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.manifest = os.path.join(self.dir, "manifest.json")
+        self.files = [self.make("img%d.webp" % i, i * 60) for i in range(3)]
+
+    def make(self, name, red):
+        path = os.path.join(self.dir, name)
+        Image.new("RGBA", (32, 16), (red, 0, 0, 128)).save(path)
+        return path
+
+    def run_main(self, files=None, **options):
+        args = argparse.Namespace(
+            files=self.files if files is None else files,
+            ignore=False,
+            delete=False,
+            jobs=1,
+            max_size=None,
+            quality=None,
+            incremental=True,
+            manifest=self.manifest,
+        )
+        vars(args).update(options)
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = webp2jpg.main(args)
+        return status, out.getvalue().split(), err.getvalue()
+
+    def test_rerun_converts_only_changed_sources(self):
+        _, converted, _ = self.run_main()
+        self.assertEqual(len(converted), 3)
+
+        _, converted, err = self.run_main()
+        self.assertEqual(converted, [])
+        self.assertIn("(0 failed, 3 up to date)", err)
+
+        self.make("img1.webp", 255)
+        os.utime(self.files[2], ns=(1, 1))  # touched, but the same content
+        _, converted, err = self.run_main()
+        self.assertEqual(converted, [webp2jpg.jpg_name(self.files[1])])
+        self.assertIn("(0 failed, 2 up to date)", err)
+
+    def test_changed_settings_reconvert(self):
+        self.run_main()
+
+        _, converted, _ = self.run_main(quality=40)
+
+        self.assertEqual(len(converted), 3)
+
+    def test_removes_outputs_of_deleted_sources(self):
+        self.run_main()
+        jpgs = [webp2jpg.jpg_name(f) for f in self.files]
+        os.remove(self.files[0])
+        os.remove(self.files[1])
+        with open(jpgs[1], "ab") as f:
+            f.write(b"edited")
+
+        _, _, err = self.run_main(files=self.files[2:])
+
+        self.assertIn("removed " + jpgs[0], err)
+        self.assertEqual([os.path.exists(j) for j in jpgs], [False, True, True])
+        self.assertEqual(list(webp2jpg.load_manifest(self.manifest)), self.files[2:])
+
+    def test_unknown_jpg_in_the_way(self):
+        open(webp2jpg.jpg_name(self.files[0]), "w").close()
+
+        status, converted, err = self.run_main()
+
+        self.assertEqual(status, 1)
+        self.assertIn("AlreadyExists", err)
+        self.assertEqual(len(converted), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,122 @@
 #!/usr/bin/env python3
 
-from pathlib import Path
+import math
+import os
+import re
+import sqlite3
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Iterator
+from contextlib import closing
+from pathlib import Path
 
+# The index is refreshed when it is older than this many seconds, when an
+# indexed directory that is not a repo root changes, and when a query comes
+# up empty or names a repo that no longer exists.
+INDEX_MAX_AGE = 600
+INDEX_VERSION = 3
 
-def find_matches(coding_dir: Path, query: str) -> list[str]:
-    matches: list[tuple[int, str]] = []
-    for path in coding_dir.rglob(".git"):
-        if not (path.is_dir() or path.is_file()):
+# A fuzzy match must share at least this fraction of the query's trigrams.
+# Matches are ranked by trigram similarity of the query and the repo's
+# path below the coding dir: shared trigrams over all trigrams of both.
+FUZZY_MIN_SHARE = 0.5
+
+# Directories never worth descending into when looking for repos.
+# Override with a comma-separated VENV_MATCH_PRUNE.
+DEFAULT_PRUNE = frozenset(
+    {
+        ".git",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "build",
+        "dist",
+        "node_modules",
+        "target",
+        "venv",
+    }
+)
+
+
+def prune_names() -> frozenset[str]:
+    override = os.environ.get("VENV_MATCH_PRUNE")
+    if override is None:
+        return DEFAULT_PRUNE
+    # .git internals never hold a repo root, so it is always pruned
+    return frozenset(name for name in override.split(",") if name) | {".git"}
+
+
+def _list_dir(path: str, prune: frozenset[str], nested: bool) -> tuple[bool, list[str]]:
+    """
+    Return whether ``path`` is a repo root (holds a ``.git`` file or
+    directory) and the subdirectories still worth walking: none inside a
+    repo unless ``nested``, never pruned names, never symlinks.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return False, []
+    is_repo = False
+    subdirs = []
+    for entry in entries:
+        try:
+            if entry.name == ".git":
+                is_repo = is_repo or entry.is_dir() or entry.is_file()
+            elif entry.name not in prune and entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+        except OSError:
             continue
-        project_root = str(path.parent)
-        path_str = project_root
+    if is_repo and not nested:
+        return True, []
+    return is_repo, subdirs
+
+
+def _walk_subtree(top: str, prune: frozenset[str], nested: bool) -> list[str]:
+    repos = []
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        is_repo, subdirs = _list_dir(path, prune, nested)
+        if is_repo:
+            repos.append(path)
+        stack.extend(subdirs)
+    return repos
+
+
+def walk_repos(
+    coding_dir: Path,
+    nested: bool = False,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+    jobs: int | None = None,
+) -> list[str]:
+    """
+    Find repo roots under ``coding_dir`` (unordered), walking each
+    top-level subtree on its own thread of a ``jobs``-sized pool.
+    """
+    root = str(coding_dir)
+    is_repo, subdirs = _list_dir(root, prune, nested)
+    repos = [root] if is_repo else []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for found in executor.map(
+            lambda top: _walk_subtree(top, prune, nested), subdirs
+        ):
+            repos.extend(found)
+    return repos
+
+
+def find_matches(
+    coding_dir: Path,
+    query: str,
+    nested: bool = False,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+    jobs: int | None = None,
+) -> list[str]:
+    matches: list[tuple[int, str]] = []
+    for path_str in walk_repos(coding_dir, nested, prune, jobs):
         if query in path_str.lower():
             depth = path_str.count("/")
             matches.append((depth, path_str))
@@ -19,32 +125,387 @@ def find_matches(coding_dir: Path, query: str) -> list[str]:
     return [item[1] for item in matches]
 
 
-def parse_args(argv: list[str]) -> tuple[bool, str] | None:
+def iter_matches(
+    coding_dir: Path,
+    query: str,
+    nested: bool = False,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+) -> Iterator[str]:
+    """
+    Yield the same repos as ``find_matches``, in the same ``(depth, path)``
+    order, walking breadth first: a level is listed only once every
+    shallower match has been yielded, so taking the first match reads
+    just the levels down to the shallowest one.
+    """
+    level = [str(coding_dir)]
+    while level:
+        repos = []
+        next_level = []
+        for path in level:
+            is_repo, subdirs = _list_dir(path, prune, nested)
+            if is_repo and query in path.lower():
+                repos.append(path)
+            next_level.extend(subdirs)
+        yield from sorted(repos)
+        level = next_level
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Trigrams of each alphanumeric word in ``text``, lowercased and padded
+    as in pg_trgm (two spaces before, one after) so that word starts
+    weigh more and even one- or two-letter queries have trigrams.
+    """
+    grams = set()
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def default_index_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "venv-match" / "index.sqlite3"
+
+
+def open_index(index_path: Path) -> sqlite3.Connection:
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    if _get_meta(conn, "version") != str(INDEX_VERSION):
+        # Tables from another layout; the index is rebuilt on first query
+        conn.executescript("DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS grams;")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS dirs (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            depth INTEGER NOT NULL,
+            is_repo INTEGER NOT NULL,
+            grams INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS repos ON dirs (is_repo, depth, path);
+        CREATE TABLE IF NOT EXISTS grams (
+            gram TEXT NOT NULL,
+            path TEXT NOT NULL,
+            PRIMARY KEY (gram, path)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS grams_by_path ON grams (path);
+        """)
+    return conn
+
+
+def _get_meta(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+
+def _stat_dir(
+    path: str, prune: frozenset[str], nested: bool
+) -> tuple[int, bool, list[str]] | None:
+    """
+    Return the mtime of ``path`` along with ``_list_dir``'s answer for it,
+    or None if it is gone.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    is_repo, subdirs = _list_dir(path, prune, nested)
+    return mtime_ns, is_repo, subdirs
+
+
+def _record_dir(
+    conn: sqlite3.Connection, root: str, path: str, mtime_ns: int, is_repo: bool
+) -> None:
+    """
+    Record the mtime of ``path``, whether it is a repo root and, if so, the
+    trigrams of its path below ``root``.
+    """
+    grams = trigrams(os.path.relpath(path, root)) if is_repo else set()
+    conn.execute(
+        "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)",
+        (path, mtime_ns, path.count("/"), is_repo, len(grams)),
+    )
+    conn.execute("DELETE FROM grams WHERE path = ?", (path,))
+    conn.executemany(
+        "INSERT INTO grams VALUES (?, ?)", ((gram, path) for gram in grams)
+    )
+
+
+def _scan_dir(
+    conn: sqlite3.Connection,
+    root: str,
+    path: str,
+    prune: frozenset[str],
+    nested: bool,
+) -> list[str]:
+    """Record ``path`` and return the subdirectories to walk."""
+    listing = _stat_dir(path, prune, nested)
+    if listing is None:
+        return []
+    mtime_ns, is_repo, subdirs = listing
+    _record_dir(conn, root, path, mtime_ns, is_repo)
+    return subdirs
+
+
+def _survey_subtree(
+    top: str, prune: frozenset[str], nested: bool
+) -> list[tuple[str, int, bool]]:
+    """
+    Return ``(path, mtime_ns, is_repo)`` for ``top`` and every directory
+    to walk below it. The index is not touched, so this can run on a
+    worker thread while the caller writes the rows.
+    """
+    dirs = []
+    stack = [top]
+    while stack:
+        path = stack.pop()
+        listing = _stat_dir(path, prune, nested)
+        if listing is None:
+            continue
+        mtime_ns, is_repo, subdirs = listing
+        dirs.append((path, mtime_ns, is_repo))
+        stack.extend(subdirs)
+    return dirs
+
+
+def _scan_tree(
+    conn: sqlite3.Connection,
+    root: str,
+    top: str,
+    prune: frozenset[str],
+    nested: bool,
+) -> None:
+    for path, mtime_ns, is_repo in _survey_subtree(top, prune, nested):
+        _record_dir(conn, root, path, mtime_ns, is_repo)
+
+
+def _index_options(prune: frozenset[str], nested: bool) -> str:
+    return f"{int(nested)}:{','.join(sorted(prune))}"
+
+
+def rebuild_index(
+    conn: sqlite3.Connection,
+    coding_dir: Path,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+    nested: bool = False,
+    jobs: int | None = None,
+) -> None:
+    """
+    Index ``coding_dir`` from scratch, surveying each top-level subtree
+    on its own thread of a ``jobs``-sized pool, as ``walk_repos`` does;
+    rows are written on this thread, since the connection is not shared.
+    """
+    root = str(coding_dir)
+    conn.execute("DELETE FROM dirs")
+    conn.execute("DELETE FROM grams")
+    subdirs = _scan_dir(conn, root, root, prune, nested)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for dirs in executor.map(
+            lambda top: _survey_subtree(top, prune, nested), subdirs
+        ):
+            for path, mtime_ns, is_repo in dirs:
+                _record_dir(conn, root, path, mtime_ns, is_repo)
+    _set_meta(conn, "root", str(coding_dir))
+    _set_meta(conn, "version", str(INDEX_VERSION))
+    _set_meta(conn, "options", _index_options(prune, nested))
+    _set_meta(conn, "refreshed", str(time.time()))
+    conn.commit()
+
+
+def refresh_index(
+    conn: sqlite3.Connection,
+    coding_dir: Path,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+    nested: bool = False,
+) -> None:
+    """
+    Bring the index up to date, re-listing only the directories whose
+    mtime changed (an entry was added, removed or renamed directly inside
+    them) and walking any new subdirectories they turn up. Every other
+    directory costs one stat; ones that are gone are dropped.
+    """
+    known = dict(conn.execute("SELECT path, mtime_ns FROM dirs"))
+    for path, mtime_ns in known.items():
+        try:
+            current = os.stat(path).st_mtime_ns
+        except OSError:
+            current = None
+        if current == mtime_ns:
+            continue
+        conn.execute("DELETE FROM dirs WHERE path = ?", (path,))
+        conn.execute("DELETE FROM grams WHERE path = ?", (path,))
+        if current is None:
+            continue
+        for subdir in _scan_dir(conn, str(coding_dir), path, prune, nested):
+            if subdir not in known:
+                _scan_tree(conn, str(coding_dir), subdir, prune, nested)
+    _set_meta(conn, "refreshed", str(time.time()))
+    conn.commit()
+
+
+def _is_stale(conn: sqlite3.Connection, coding_dir: Path) -> bool:
+    refreshed = float(_get_meta(conn, "refreshed") or 0)
+    if time.time() - refreshed > INDEX_MAX_AGE:
+        return True
+    # A new checkout changes the mtime of the directory it lands in. Walks
+    # stop at repo roots, so the directories holding them are few and cheap
+    # to stat; repo roots themselves are skipped, as their mtimes churn with
+    # everyday work. With --nested, a repo created directly inside another
+    # repo's root therefore waits for INDEX_MAX_AGE or an empty query.
+    folders = conn.execute("SELECT path, mtime_ns FROM dirs WHERE NOT is_repo")
+    for path, mtime_ns in folders:
+        try:
+            if os.stat(path).st_mtime_ns != mtime_ns:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def _query_index(conn: sqlite3.Connection, query: str) -> list[str]:
+    rows = conn.execute("SELECT path FROM dirs WHERE is_repo ORDER BY depth, path")
+    return [path for (path,) in rows if query in path.lower()]
+
+
+def _query_fuzzy(conn: sqlite3.Connection, query: str) -> list[str]:
+    """
+    Repos sharing at least ``FUZZY_MIN_SHARE`` of the query's trigrams,
+    most similar first, then shallowest, then by path. A query without any
+    trigrams (empty, or just punctuation) falls back to a substring match.
+    """
+    grams = trigrams(query)
+    if not grams:
+        return _query_index(conn, query)
+    placeholders = ", ".join("?" * len(grams))
+    rows = conn.execute(
+        f"""
+        SELECT path FROM grams JOIN dirs USING (path)
+        WHERE gram IN ({placeholders})
+        GROUP BY path
+        HAVING COUNT(*) >= ?
+        ORDER BY COUNT(*) * 1.0 / (? + dirs.grams - COUNT(*)) DESC, depth, path
+        """,
+        (*grams, math.ceil(len(grams) * FUZZY_MIN_SHARE), len(grams)),
+    )
+    return [path for (path,) in rows]
+
+
+def _needs_rebuild(
+    conn: sqlite3.Connection, coding_dir: Path, prune: frozenset[str], nested: bool
+) -> bool:
+    return (
+        _get_meta(conn, "root") != str(coding_dir)
+        or _get_meta(conn, "version") != str(INDEX_VERSION)
+        or _get_meta(conn, "options") != _index_options(prune, nested)
+    )
+
+
+def indexed_matches(
+    coding_dir: Path,
+    query: str,
+    index_path: Path | None = None,
+    rebuild: bool = False,
+    nested: bool = False,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+    fuzzy: bool = False,
+) -> list[str]:
+    """
+    Same result as ``find_matches``, answered from a persistent index of
+    repo roots that is built on first use and refreshed when stale. With
+    ``fuzzy``, repos are instead ranked by trigram similarity to the query.
+    """
+    query_index = _query_fuzzy if fuzzy else _query_index
+    with closing(open_index(index_path or default_index_path())) as conn:
+        if rebuild or _needs_rebuild(conn, coding_dir, prune, nested):
+            rebuild_index(conn, coding_dir, prune, nested)
+            return query_index(conn, query)
+        if _is_stale(conn, coding_dir):
+            refresh_index(conn, coding_dir, prune, nested)
+            return query_index(conn, query)
+        matches = query_index(conn, query)
+        if not matches or not all(os.path.isdir(m) for m in matches):
+            refresh_index(conn, coding_dir, prune, nested)
+            matches = query_index(conn, query)
+        return matches
+
+
+def first_match(
+    coding_dir: Path,
+    query: str,
+    index_path: Path | None = None,
+    nested: bool = False,
+    prune: frozenset[str] = DEFAULT_PRUNE,
+) -> str | None:
+    """
+    The first of ``indexed_matches``. Without a usable index, stream a
+    breadth-first search and stop at the first hit rather than paying for
+    a full index build.
+    """
+    index_path = index_path or default_index_path()
+    with closing(open_index(index_path)) as conn:
+        cold = _needs_rebuild(conn, coding_dir, prune, nested)
+    if cold:
+        return next(iter_matches(coding_dir, query, nested, prune), None)
+    matches = indexed_matches(coding_dir, query, index_path, nested=nested, prune=prune)
+    return matches[0] if matches else None
+
+
+def parse_args(argv: list[str]) -> tuple[bool, bool, bool, bool, str] | None:
     single_only = False
+    rebuild = False
+    nested = False
+    fuzzy = False
     args = argv[:]
 
-    if args and args[0] == "-1":
-        single_only = True
+    while args and args[0] in ("-1", "--rebuild", "--nested", "--fuzzy"):
+        if args[0] == "-1":
+            single_only = True
+        elif args[0] == "--rebuild":
+            rebuild = True
+        elif args[0] == "--nested":
+            nested = True
+        else:
+            fuzzy = True
         args = args[1:]
 
     if len(args) > 1:
         return None
 
     query = args[0].lower() if args else ""
-    return single_only, query
+    return single_only, rebuild, nested, fuzzy, query
 
 
 def main() -> int:
     parsed = parse_args(sys.argv[1:])
     if parsed is None:
-        print("Usage: venv-match [-1] [project-name-fragment]", file=sys.stderr)
+        print(
+            "Usage: venv-match [-1] [--rebuild] [--nested] [--fuzzy]"
+            " [project-name-fragment]",
+            file=sys.stderr,
+        )
         return 1
 
-    single_only, query = parsed
+    single_only, rebuild, nested, fuzzy, query = parsed
 
     coding_dir = Path.home() / "coding"
+    prune = prune_names()
+
+    # Ranking needs every candidate, so only substring -1 can stop early
+    if single_only and not rebuild and not fuzzy:
+        match = first_match(coding_dir, query, nested=nested, prune=prune)
+        if match is None:
+            return 1
+        print(match)
+        return 0
 
-    matches = find_matches(coding_dir, query)
+    matches = indexed_matches(
+        coding_dir, query, rebuild=rebuild, nested=nested, prune=prune, fuzzy=fuzzy
+    )
     if not matches:
         return 1
 
@@ -57,4 +518,4 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -2,26 +2,248 @@
 '''
 Given a set of filenames of images, converts these images into a jpg
 and save in the same directory.
+
+Files that fail (including ones whose jpg already exists, unless
+--ignore) are reported and skipped; the exit status is 1 if any failed.
+
+With --incremental, a manifest records what each jpg was made from, so
+that re-runs convert only new or changed sources and remove the jpgs of
+sources that are gone.
 '''
 import argparse
+import functools
+import hashlib
+import json
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from imgtool import open_rgb, parse_size, save_options
+
+MANIFEST_NAME = '.webp2jpg-manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def jpg_name(filename):
+    basename, ext = os.path.splitext(filename)
+    return basename + '.jpg'
+
+
+def convert(filename, ignore=False, delete=False, max_size=None, quality=None):
+    '''
+    Convert ``filename`` to a jpg beside it, no larger than ``max_size``,
+    and return the jpg's name, the size of the source and the size of
+    the jpg.
+    '''
+    img = open_rgb(filename, max_size)
+    jpgname = jpg_name(filename)
+    if os.path.exists(jpgname) and not ignore:
+        raise AlreadyExists(jpgname)
+    bytes_in = os.path.getsize(filename)
+    img.save(jpgname, **save_options(quality))
+    bytes_out = os.path.getsize(jpgname)
+    if delete:
+        os.remove(filename)
+    return jpgname, bytes_in, bytes_out
+
+
+def try_convert(filename, **options):
+    '''
+    ``convert``, returning ``(result, None)`` or, if it failed,
+    ``(None, message)``, so one bad file does not stop a batch.
+    '''
+    try:
+        return convert(filename, **options), None
+    except Exception as e:
+        return None, '{}: {}'.format(type(e).__name__, e)
+
+
+def convert_all(files, jobs=1, **options):
+    '''
+    Yield ``(filename, result, error)`` for each of ``files`` in order,
+    converting up to ``jobs`` at a time in worker processes. ``options``
+    are passed on to ``convert``.
+    '''
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    mapper = executor.map if executor else map
+    try:
+        results = mapper(functools.partial(try_convert, **options), files)
+        for filename, (result, error) in zip(files, results):
+            yield filename, result, error
+    finally:
+        if executor:
+            executor.shutdown()
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    '''
+    The manifest at ``path``: a dict mapping each converted source's
+    absolute path to what it was when converted (size, mtime, SHA-256),
+    the settings used and the jpg made from it. Empty if there is none.
+    '''
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data['entries']
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'entries': manifest}, f)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(filename, entry, settings):
+    '''
+    Whether ``entry`` shows ``filename`` was already converted with
+    ``settings`` and its jpg is still there. Sources whose size and
+    mtime are unchanged are not read; ones only touched are recognised
+    by their hash, and ``entry`` is updated to the new mtime.
+    '''
+    if entry is None or entry['settings'] != settings:
+        return False
+    if not os.path.exists(entry['output']):
+        return False
+    st = os.stat(filename)
+    if (st.st_size, st.st_mtime_ns) == (entry['size'], entry['mtime_ns']):
+        return True
+    if st.st_size == entry['size'] and file_digest(filename) == entry['sha256']:
+        entry['mtime_ns'] = st.st_mtime_ns
+        return True
+    return False
+
+
+def record(manifest, filename, jpgname, settings):
+    st = os.stat(filename)
+    out = os.stat(jpgname)
+    manifest[os.path.abspath(filename)] = {
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': file_digest(filename),
+        'settings': settings,
+        'output': os.path.abspath(jpgname),
+        'output_size': out.st_size,
+        'output_mtime_ns': out.st_mtime_ns,
+    }
+
+
+def remove_orphans(manifest):
+    '''
+    Drop entries whose source is gone, deleting their jpg unless it was
+    changed or replaced since it was written. Returns the jpgs deleted.
+    '''
+    removed = []
+    for source, entry in list(manifest.items()):
+        if os.path.exists(source):
+            continue
+        del manifest[source]
+        try:
+            out = os.stat(entry['output'])
+        except FileNotFoundError:
+            continue
+        if (out.st_size, out.st_mtime_ns) == (entry['output_size'],
+                                              entry['output_mtime_ns']):
+            os.remove(entry['output'])
+            removed.append(entry['output'])
+    return removed
+
+
+def plan_incremental(files, manifest, settings, ignore=False):
+    '''
+    Split ``files`` into those to convert, a count of those up to date
+    and ``(filename, error)`` for those that cannot be: a jpg the manifest
+    does not know of is in the way, unless ``ignore``.
+    '''
+    todo = []
+    skipped = 0
+    errors = []
+    for filename in files:
+        entry = manifest.get(os.path.abspath(filename))
+        try:
+            if is_up_to_date(filename, entry, settings):
+                skipped += 1
+                continue
+        except OSError as e:
+            errors.append((filename, '{}: {}'.format(type(e).__name__, e)))
+            continue
+        jpgname = os.path.abspath(jpg_name(filename))
+        owned = entry is not None and entry['output'] == jpgname
+        if os.path.exists(jpgname) and not owned and not ignore:
+            errors.append((filename, 'AlreadyExists: {}'.format(jpg_name(filename))))
+            continue
+        todo.append(filename)
+    return todo, skipped, errors
+
+
+def format_summary(converted, failed, elapsed, bytes_in, bytes_out,
+                   skipped=None):
+    rate = converted / elapsed if elapsed else 0.0
+    counts = '{} failed'.format(failed)
+    if skipped is not None:
+        counts += ', {} up to date'.format(skipped)
+    return (
+        'Converted {} images ({}) in {:.1f}s: {:.1f} images/sec, '
+        '{:.1f} MB in, {:.1f} MB out'.format(
+            converted, counts, elapsed, rate, bytes_in / 1e6, bytes_out / 1e6,
+        )
+    )
 
-from PIL import Image
- 
 
 def main(args):
-    for filename in args.files:
-        img = Image.open(filename)
-        img = img.convert('RGB')
-        basename, ext = os.path.splitext(filename)
-        jpgname = basename + '.jpg'
-        if os.path.exists(jpgname) and not args.ignore:
-            raise AlreadyExists(jpgname)
-        img.save(jpgname)
+    start = time.perf_counter()
+    converted = failed = bytes_in = bytes_out = 0
+    files = args.files
+    ignore = args.ignore
+    skipped = None
+    if args.incremental:
+        manifest = load_manifest(args.manifest)
+        settings = [list(args.max_size) if args.max_size else None, args.quality]
+        files, skipped, errors = plan_incremental(files, manifest, settings,
+                                                  ignore)
+        for filename, error in errors:
+            print('{}: {}'.format(filename, error), file=sys.stderr)
+        failed += len(errors)
+        # jpgs in the way were either made by us or allowed by --ignore
+        ignore = True
+    results = convert_all(files, args.jobs, ignore=ignore,
+                          delete=args.delete, max_size=args.max_size,
+                          quality=args.quality)
+    for filename, result, error in results:
+        if error:
+            print('{}: {}'.format(filename, error), file=sys.stderr)
+            failed += 1
+            continue
+        jpgname, size_in, size_out = result
         print(jpgname)
-        if args.delete:
-            os.remove(filename)
+        if args.incremental:
+            record(manifest, filename, jpgname, settings)
+        converted += 1
+        bytes_in += size_in
+        bytes_out += size_out
+    if args.incremental:
+        for jpgname in remove_orphans(manifest):
+            print('removed {}'.format(jpgname), file=sys.stderr)
+        save_manifest(args.manifest, manifest)
+    elapsed = time.perf_counter() - start
+    print(format_summary(converted, failed, elapsed, bytes_in, bytes_out,
+                         skipped),
+          file=sys.stderr)
+    return 1 if failed else 0
 
 
 class AlreadyExists(Exception):
@@ -33,4 +255,19 @@ if __name__ == '__main__':
     parser.add_argument('files', nargs='+')
     parser.add_argument('--delete', action='store_true')
     parser.add_argument('--ignore', action='store_true')
-    main(parser.parse_args())
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of images to convert in parallel')
+    parser.add_argument('--max-size', type=parse_size,
+                        help='shrink images to fit within WxH, e.g. 1920x1080')
+    parser.add_argument('--quality', type=int,
+                        help='JPEG quality, 1-95 (default: Pillow\'s 75)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='convert only new or changed sources and remove '
+                             'jpgs whose source is gone')
+    parser.add_argument('--manifest', default=MANIFEST_NAME,
+                        help='manifest for --incremental (default: {})'
+                             .format(MANIFEST_NAME))
+    args = parser.parse_args()
+    if args.incremental and args.delete:
+        parser.error('--incremental cannot be combined with --delete')
+    sys.exit(main(args))